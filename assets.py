@@ -0,0 +1,133 @@
+"""本机资源服务：字体子集、出图、分词兜底、性能统计这些动态路由，结果按内容哈希带 ETag 和缓存头返回。"""
+import hashlib
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+NO_STORE = "no-store"
+# POST 请求体上限
+MAX_BODY = 65536
+
+
+class Asset:
+    __slots__ = ("name", "data", "mimetype", "digest", "cache_control")
+
+    def __init__(self, name, data, mimetype, cache_control=IMMUTABLE_CACHE):
+        self.name = name
+        self.data = data
+        self.mimetype = mimetype
+        self.digest = hashlib.sha256(data).hexdigest()[:16]
+        # 内容随时间变化的动态路由（比如统计汇总）传 NO_STORE
+        self.cache_control = cache_control
+
+    @property
+    def etag(self):
+        return f'"{self.digest}"'
+
+
+class _AssetHandler(BaseHTTPRequestHandler):
+    routes = None
+    post_routes = None
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def do_POST(self):
+        path, _, query = self.path.partition("?")
+        route = self.post_routes.get(path)
+        if route is None:
+            self.send_error(404)
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY:
+                self.send_error(413)
+                return
+            asset = route(dict(parse_qsl(query)), self.rfile.read(length))
+        except ValueError as err:
+            self.send_error(400, str(err))
+            return
+        if asset is None:
+            self.send_response(204)
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            return
+        self._send_asset(asset, head=False)
+
+    def _serve(self, head):
+        path, _, query = self.path.partition("?")
+        route = self.routes.get(path)
+        if route is None:
+            self.send_error(404)
+            return
+        # 路由按参数生成内容，返回的 Asset 带 ETag，内容没变时回 304
+        try:
+            asset = route(dict(parse_qsl(query)))
+        except ValueError as err:
+            self.send_error(400, str(err))
+            return
+        if asset is None:
+            self.send_error(404)
+            return
+        if asset.etag in self.headers.get("If-None-Match", ""):
+            self.send_response(304)
+            self._send_cache_headers(asset)
+            self.end_headers()
+            return
+        self._send_asset(asset, head)
+
+    def _send_asset(self, asset, head):
+        self.send_response(200)
+        self.send_header("Content-Type", asset.mimetype)
+        self.send_header("Content-Length", str(len(asset.data)))
+        self._send_cache_headers(asset)
+        self.end_headers()
+        if not head:
+            self.wfile.write(asset.data)
+
+    def _send_cache_headers(self, asset):
+        self.send_header("ETag", asset.etag)
+        self.send_header("Cache-Control", asset.cache_control)
+        # 组件 iframe 跨域加载字体、fetch 分词和统计需要 CORS
+        self.send_header("Access-Control-Allow-Origin", "*")
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class AssetServer:
+    def __init__(self, host="127.0.0.1", port=8765):
+        self.host = host
+        self.port = port
+        self.routes = {}
+        self.post_routes = {}
+        self._httpd = None
+
+    def add_route(self, path, route):
+        """route(query) 返回 Asset 或 None，参数不合法时抛 ValueError。"""
+        self.routes[path] = route
+
+    def add_post_route(self, path, route):
+        """route(query, body) 返回 Asset 或 None（回 204），参数不合法时抛 ValueError。"""
+        self.post_routes[path] = route
+
+    def start(self):
+        handler = type("AssetHandler", (_AssetHandler,), {"routes": self.routes, "post_routes": self.post_routes})
+        self._httpd = ThreadingHTTPServer((self.host, self.port), handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        thread = threading.Thread(target=self._httpd.serve_forever, name="asset-server", daemon=True)
+        thread.start()
+        logger.info("asset server listening on port %s", self.port)
+        return self
+
+    @property
+    def running(self):
+        return self._httpd is not None
@@ -0,0 +1,174 @@
+"""脚本性能基准：冷启动、重跑延迟（中位数 / p99）、峰值内存、每次重跑发给前端的字节数。
+
+基于 streamlit.testing.v1.AppTest，不用起浏览器。结果可以存成基线 JSON，之后拿来对比：
+    python bench.py --reruns 50 --save bench_baseline.json
+    python bench.py --compare bench_baseline.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(BASE_DIR, "app.py")
+
+# 在新进程里计时：从 import streamlit 到第一次跑完 app.py
+_COLD_START = """
+import json, resource, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+finished = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - started,
+    "first_run_s": finished - imported,
+    "exceptions": len(at.exception),
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1))]
+
+
+def emitted_bytes(at):
+    # 这次重跑的元素序列化后的大小，约等于发给浏览器的增量消息
+    return sum(e.proto.ByteSize() for e in at.main if getattr(e, "proto", None) is not None)
+
+
+def page_bytes(at):
+    """组件页面（只在 iframe 首次加载时下载一次）的大小和 gzip 后大小。"""
+    import gzip
+
+    from component import COMPONENT_DIR
+
+    for e in at.main:
+        name = getattr(getattr(e, "proto", None), "component_name", "")
+        if "page_" in name:
+            with open(os.path.join(COMPONENT_DIR, name.rsplit("page_", 1)[1], "index.html"), "rb") as f:
+                data = f.read()
+            return {"bytes": len(data), "gzip_bytes": len(gzip.compress(data))}
+    return None
+
+
+def demo_scene(count=150, seed=0):
+    """满员场景的分享 token，用来测量场景同步带来的额外开销。"""
+    from scene import encode_scene
+
+    rng = random.Random(seed)
+    floaters = [
+        [f"word{i}", rng.uniform(0, 600), rng.uniform(0, 450), rng.uniform(-0.25, 0.25), rng.uniform(-0.25, 0.25),
+         [rng.randrange(10), rng.randrange(9), rng.randrange(30, 150), 25, 25,
+          rng.randrange(24), rng.randrange(24), rng.randrange(24), rng.randrange(24),
+          round(rng.uniform(0.4, 3), 2), round(rng.uniform(0.6, 3), 2), rng.uniform(-20, 20), rng.uniform(-30, 30), 0]]
+        for i in range(count)
+    ]
+    return encode_scene({"width": 700, "height": 525, "background": "bliss", "floaters": floaters})
+
+
+def cold_start():
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", _COLD_START, APP], capture_output=True, text=True, check=True,
+                         cwd=BASE_DIR)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    # 总时间包括解释器启动
+    result["total_s"] = time.perf_counter() - started
+    return result
+
+
+def reruns(count, query=None):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=120)
+    for key, value in (query or {}).items():
+        at.query_params[key] = value
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    timings, sizes = [], []
+    for _ in range(count):
+        started = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - started) * 1000)
+        sizes.append(emitted_bytes(at))
+    return {
+        "runs": count,
+        "page": page_bytes(at),
+        "median_ms": statistics.median(timings),
+        "p99_ms": percentile(timings, 0.99),
+        "mean_ms": statistics.fmean(timings),
+        "bytes_per_rerun": statistics.median(sizes),
+    }
+
+
+def run_benchmarks(count):
+    # 不和正在跑的应用抢资源服务端口
+    os.environ.setdefault("PASSION_ASSET_PORT", "0")
+    results = {
+        "python": platform.python_version(),
+        "cold_start": cold_start(),
+        "reruns": {
+            "default": reruns(count),
+            "scene150": reruns(count, {"scene": demo_scene()}),
+            "canvas_baked": reruns(count, {"renderer": "canvas", "crt": "baked"}),
+        },
+    }
+    # 峰值内存：子进程和当前进程各自的最大常驻内存
+    results["peak_rss_mb"] = max(results["cold_start"]["peak_rss_mb"],
+                                 resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+    return results
+
+
+def flatten(results, prefix=""):
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from flatten(value, f"{name}.")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def compare(results, baseline):
+    old = dict(flatten(baseline))
+    for name, value in flatten(results):
+        if name.endswith(".runs"):
+            continue
+        if name not in old:
+            print(f"{name:40} {value:12.2f}")
+            continue
+        before = old[name]
+        change = (value - before) / before * 100 if before else 0.0
+        print(f"{name:40} {before:12.2f} -> {value:12.2f}  ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=30, help="每个场景重跑的次数")
+    parser.add_argument("--save", metavar="PATH", help="把结果存成基线 JSON")
+    parser.add_argument("--compare", metavar="PATH", help="和已有的基线 JSON 对比")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.reruns)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""双向组件：页面作为 Streamlit 自定义组件加载，前端把场景 token（格式见 scene.py）同步回 session_state。
+
+组件带固定 key，重跑时 iframe 保持不动，前端只收到一条新的 render 消息；
+iframe 被重建（页面参数变了）或从分享链接打开时按 token 恢复，不再重新生成。
+"""
+import atexit
+import functools
+import hashlib
+import os
+import shutil
+import tempfile
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+# 每份页面按摘要写成一个组件目录；页面只随部署配置和 ?renderer= / ?crt= 变，目录就那么几个。
+# 默认每个进程一个私有临时目录（mkdtemp 只有本用户可读写），进程退出时删掉
+COMPONENT_DIR = os.environ.get("PASSION_COMPONENT_DIR") or tempfile.mkdtemp(prefix="passion-component-")
+if "PASSION_COMPONENT_DIR" not in os.environ:
+    atexit.register(shutil.rmtree, COMPONENT_DIR, ignore_errors=True)
+SCENE_KEY = "scene"
+FRAME_HEIGHT = 1000
+# Streamlit 的静态目录（server.enableStaticServing，见 .streamlit/config.toml），同源提供在 <base>/app/static/ 下
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+
+def _write_if_changed(path, data):
+    # 已有文件和要写的内容不一致（写了一半、被改过）时整个重写
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return
+    except OSError:
+        pass
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+@functools.lru_cache(maxsize=None)
+def static_url(name):
+    """static/ 下的文件在组件页面里的地址，带内容哈希当版本号；静态服务没开或文件不在时返回 None。"""
+    if not st.get_option("server.enableStaticServing"):
+        return None
+    try:
+        with open(os.path.join(STATIC_DIR, name), "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    except OSError:
+        return None
+    # 组件页面在 <base>/component/<组件名>/index.html，相对路径回到 <base>，反向代理加了路径前缀也对
+    return f"../../app/static/{name}?v={digest}"
+
+
+@functools.lru_cache(maxsize=64)
+def _component_dir(page):
+    path = os.path.join(COMPONENT_DIR, page.digest)
+    os.makedirs(path, exist_ok=True)
+    _write_if_changed(os.path.join(path, "index.html"), page.html.encode("utf-8"))
+    return path
+
+
+def scene_component(page, scene=None, options=None, key=SCENE_KEY, height=FRAME_HEIGHT):
+    """挂载页面，返回前端最近一次同步上来的场景 token（还没有时为 None）。
+
+    scene 是会话里还没有场景时的开场 token（比如分享链接里的）；
+    options 是运行参数（种子、帧率等），随 render 消息下发，变了也不重建 iframe。
+    """
+    component = components.declare_component(f"page_{page.digest}", path=_component_dir(page))
+    # 上一次同步的 token 原样带回去：iframe 还在时前端认出是自己发的，直接忽略
+    return component(scene=st.session_state.get(key) or scene, options=options or {}, height=height, key=key, default=None)
@@ -0,0 +1,132 @@
+"""前端 fontFamilies 对应的本地字体文件查找，以及按文字子集化的 WOFF2。"""
+import functools
+import glob
+import io
+import os
+import re
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 和 frontend/styles.js 的 fontFamilies 对应；每个字体按优先级列出常见文件名（粗体优先，前端统一用 900 字重）。
+# 只放真字体和度量兼容的替身（Liberation Serif / Mono 对 Times New Roman / Courier New），
+# 资源服务会按这里的家族名注册成浏览器字体，会盖过客户端本机装的同名字体
+FONT_FILES = {
+    "Comic Sans MS": ["comicbd.ttf", "Comic Sans MS Bold.ttf", "comic.ttf", "Comic Sans MS.ttf"],
+    "Impact": ["impact.ttf", "Impact.ttf"],
+    "Times New Roman": ["timesbd.ttf", "Times New Roman Bold.ttf", "LiberationSerif-Bold.ttf"],
+    "Arial Black": ["ariblk.ttf", "Arial Black.ttf"],
+    "Papyrus": ["PAPYRUS.TTF", "Papyrus.ttc", "papyrus.ttf"],
+    "Courier New": ["courbd.ttf", "Courier New Bold.ttf", "LiberationMono-Bold.ttf"],
+    "Verdana": ["verdanab.ttf", "Verdana Bold.ttf"],
+    "Brush Script MT": ["BRUSHSCI.TTF", "Brush Script.ttf", "BrushScriptMT.ttf"],
+}
+# 长得像但度量不同的替代字体，只给 render.py 服务端出图用，不能冒名发给浏览器
+FONT_SUBSTITUTES = {
+    "Comic Sans MS": ["ComicNeue-Bold.ttf"],
+    "Impact": ["Anton-Regular.ttf"],
+    "Times New Roman": ["DejaVuSerif-Bold.ttf"],
+    "Arial Black": ["LiberationSans-Bold.ttf", "DejaVuSans-Bold.ttf"],
+    "Courier New": ["DejaVuSansMono-Bold.ttf"],
+    "Verdana": ["DejaVuSans-Bold.ttf"],
+}
+FALLBACK_FILES = ["DejaVuSans-Bold.ttf", "LiberationSans-Bold.ttf", "Arial Bold.ttf", "arialbd.ttf"]
+# 上面这些西文字体都没有汉字，遇到 CJK 文本时改用系统的中文字体（浏览器的字体回退也是这么做的）
+CJK_FILES = ["NotoSansCJK-Bold.ttc", "NotoSansCJKsc-Bold.otf", "NotoSansSC-Bold.otf", "SourceHanSansSC-Bold.otf",
+             "wqy-zenhei.ttc", "wqy-microhei.ttc", "msyhbd.ttc", "msyh.ttc", "simhei.ttf", "PingFang.ttc", "STHeiti Medium.ttc"]
+_CJK = re.compile(r"[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+
+
+def font_dirs():
+    dirs = [os.environ.get("PASSION_FONT_DIR", ""), os.path.join(BASE_DIR, "fonts")]
+    dirs += ["/usr/share/fonts", "/usr/local/share/fonts", os.path.expanduser("~/.fonts"),
+             os.path.expanduser("~/.local/share/fonts"), "/Library/Fonts", "/System/Library/Fonts",
+             os.path.expanduser("~/Library/Fonts"), r"C:\Windows\Fonts"]
+    return [d for d in dirs if d and os.path.isdir(d)]
+
+
+@functools.lru_cache(maxsize=1)
+def _font_index():
+    # 文件名（小写）→ 路径，整个进程只扫描一次
+    index = {}
+    for root in font_dirs():
+        for path in glob.glob(os.path.join(root, "**", "*.[tToO][tT][fFcC]"), recursive=True):
+            index.setdefault(os.path.basename(path).lower(), path)
+    return index
+
+
+def parse_family(css_family):
+    # '"Courier New", monospace' → 'Courier New'
+    return css_family.split(",")[0].strip().strip("'\"")
+
+
+@functools.lru_cache(maxsize=None)
+def find_font_file(css_family, exact=False):
+    """返回字体文件路径；exact=True 时只认 FONT_FILES，不退回到替代字体和通用字体。找不到返回 None。"""
+    index = _font_index()
+    family = parse_family(css_family)
+    candidates = FONT_FILES.get(family, [])
+    if not exact:
+        candidates = candidates + FONT_SUBSTITUTES.get(family, []) + FALLBACK_FILES
+    for name in candidates:
+        path = index.get(name.lower())
+        if path:
+            return path
+    return None
+
+
+def find_font_for_text(css_family, text):
+    if _CJK.search(text):
+        for name in CJK_FILES:
+            path = _font_index().get(name.lower())
+            if path:
+                return path
+    return find_font_file(css_family)
+
+
+# === 子集化 ===
+# 只包含当前文字里的字符，按 (字体文件, 字符集) 缓存；资源服务按内容哈希加长期缓存头返回
+MAX_GLYPHS = 512
+
+
+def available_families():
+    """服务端有真实（或度量兼容）字体文件的家族，不含替代字体和通用兜底字体。"""
+    return [family for family in FONT_FILES if find_font_file(family, exact=True)]
+
+
+@functools.lru_cache(maxsize=256)
+def subset_woff2(path, glyphs):
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+
+    options = subset.Options()
+    options.flavor = "woff2"
+    options.drop_tables += ["FFTM"]
+    font = TTFont(path, fontNumber=0)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text=glyphs)
+    subsetter.subset(font)
+    buffer = io.BytesIO()
+    font.flavor = "woff2"
+    font.save(buffer)
+    return buffer.getvalue()
+
+
+def make_font_route():
+    """资源服务的 /font.woff2?family=&text= 路由。"""
+    from assets import Asset
+
+    @functools.lru_cache(maxsize=256)
+    def font_asset(path, glyphs):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return Asset(f"{stem}.woff2", subset_woff2(path, glyphs), "font/woff2")
+
+    def route(query):
+        path = find_font_file(query.get("family", ""), exact=True)
+        glyphs = "".join(sorted(set(query.get("text", ""))))
+        if path is None or not glyphs:
+            return None
+        if len(glyphs) > MAX_GLYPHS:
+            raise ValueError("too many glyphs")
+        return font_asset(path, glyphs)
+
+    return route
@@ -0,0 +1,399 @@
+// === 动图导出 ===
+// 用 PhysicsWorld 把当前场景逐帧推进，每画好一帧就交给编码器，不攒整段的原始帧：
+// WebM 走 WebCodecs（VideoEncoder + 下面的简易 WebM 封装），不支持时退回 GIF（中位切分调色板 + LZW）。
+// 编码结果按块写进 ByteSink，定期合并成 Blob，内存只跟输出文件大小有关，和时长、分辨率无关。
+// 导出 Worker（见 export-worker.js）和主线程兜底共用这一份，依赖 physics.js 和 scene-draw.js。
+const SINK_CHUNK = 64 * 1024;
+const SINK_PARTS = 16;
+// 编码队列里最多积压几帧，防止画得比编码快时 VideoFrame 越堆越多
+const ENCODE_QUEUE = 2;
+const KEYFRAME_SECONDS = 2;
+
+// 只追加的字节流：小块写入先攒在一块缓冲区里，攒满的块再定期合并成 Blob（浏览器可以放到磁盘上）
+class ByteSink {
+    constructor() {
+        this.buffer = new Uint8Array(SINK_CHUNK);
+        this.length = 0;
+        this.parts = [];
+        this.blob = null;
+    }
+
+    byte(b) {
+        if (this.length === this.buffer.length) this.flush();
+        this.buffer[this.length++] = b;
+    }
+
+    bytes(data) {
+        if (this.length + data.length > this.buffer.length) {
+            this.flush();
+            if (data.length > this.buffer.length) { this.push(data.slice()); return; }
+        }
+        this.buffer.set(data, this.length);
+        this.length += data.length;
+    }
+
+    u16(v) { this.byte(v & 0xff); this.byte(v >> 8); }
+
+    flush() {
+        if (!this.length) return;
+        this.push(this.buffer.slice(0, this.length));
+        this.length = 0;
+    }
+
+    push(part) {
+        this.parts.push(part);
+        if (this.parts.length < SINK_PARTS) return;
+        this.blob = new Blob(this.blob ? [this.blob, ...this.parts] : this.parts);
+        this.parts = [];
+    }
+
+    toBlob(type) {
+        this.flush();
+        return new Blob(this.blob ? [this.blob, ...this.parts] : this.parts, { type });
+    }
+}
+
+// === GIF ===
+// 颜色先量化到每通道 5 位再做中位切分；调色板按第一帧生成，整段共用（背景不变，颜色基本都在第一帧里）
+function rgbBin(data, i) {
+    return ((data[i] >> 3) << 10) | ((data[i + 1] >> 3) << 5) | (data[i + 2] >> 3);
+}
+
+function medianCut(data, colors) {
+    const histogram = new Uint32Array(32768);
+    for (let i = 0; i < data.length; i += 4) histogram[rgbBin(data, i)]++;
+    const bins = [];
+    for (let bin = 0; bin < histogram.length; bin++) if (histogram[bin]) bins.push(bin);
+
+    const channel = (bin, c) => (bin >> (10 - c * 5)) & 31;
+    // 每个盒子建好时记下跨度最大的通道，之后不用重算
+    const makeBox = (list) => {
+        let best = -1, range = 0;
+        for (let c = 0; c < 3; c++) {
+            let low = 31, high = 0;
+            for (const bin of list) { const v = channel(bin, c); if (v < low) low = v; if (v > high) high = v; }
+            if (high - low > range) { range = high - low; best = c; }
+        }
+        return { bins: list, channel: best, range };
+    };
+
+    const boxes = [makeBox(bins)];
+    while (boxes.length < colors) {
+        // 每次切通道跨度最大的那个盒子，切在像素数的中位处
+        let pick = -1;
+        boxes.forEach((box, i) => {
+            if (box.channel >= 0 && (pick < 0 || box.range > boxes[pick].range)) pick = i;
+        });
+        if (pick < 0) break;
+        const c = boxes[pick].channel;
+        const list = boxes[pick].bins.sort((a, b) => channel(a, c) - channel(b, c));
+        let total = 0;
+        for (const bin of list) total += histogram[bin];
+        let seen = 0, cut = 1;
+        for (; cut < list.length - 1; cut++) {
+            seen += histogram[list[cut - 1]];
+            if (seen * 2 >= total) break;
+        }
+        boxes.splice(pick, 1, makeBox(list.slice(0, cut)), makeBox(list.slice(cut)));
+    }
+
+    return boxes.map(({ bins: list }) => {
+        let n = 0, r = 0, g = 0, b = 0;
+        for (const bin of list) {
+            const count = histogram[bin];
+            n += count;
+            r += count * (channel(bin, 0) * 8 + 4);
+            g += count * (channel(bin, 1) * 8 + 4);
+            b += count * (channel(bin, 2) * 8 + 4);
+        }
+        return [Math.round(r / n), Math.round(g / n), Math.round(b / n)];
+    });
+}
+
+class GifEncoder {
+    constructor(sink, width, height, colors, fps) {
+        this.sink = sink;
+        this.width = width; this.height = height;
+        this.colors = Math.max(2, Math.min(256, colors));
+        this.fps = fps;
+        this.palette = null;
+        this.indices = new Uint8Array(width * height);
+        // 颜色格子 → 调色板下标，用到时才算最近色
+        this.lookup = new Int16Array(32768).fill(-1);
+        // LZW 字典：键是 (前缀码 << 8) | 下一个下标，按代号整体作废，不用每次清表
+        this.stamp = new Uint32Array(1 << 20);
+        this.codes = new Uint16Array(1 << 20);
+        this.generation = 0;
+    }
+
+    get type() { return 'image/gif'; }
+
+    writeHeader(data) {
+        this.palette = medianCut(data, this.colors);
+        this.tableBits = Math.max(1, Math.ceil(Math.log2(this.palette.length)));
+        const s = this.sink;
+        for (const c of 'GIF89a') s.byte(c.charCodeAt(0));
+        s.u16(this.width); s.u16(this.height);
+        s.byte(0x80 | ((this.tableBits - 1) << 4) | (this.tableBits - 1));
+        s.byte(0); s.byte(0);
+        for (let i = 0; i < 1 << this.tableBits; i++) {
+            const [r, g, b] = this.palette[i] || [0, 0, 0];
+            s.byte(r); s.byte(g); s.byte(b);
+        }
+        // NETSCAPE2.0 扩展：无限循环
+        s.bytes([0x21, 0xff, 0x0b]);
+        for (const c of 'NETSCAPE2.0') s.byte(c.charCodeAt(0));
+        s.bytes([0x03, 0x01, 0x00, 0x00, 0x00]);
+    }
+
+    nearest(bin) {
+        const r = (bin >> 10) * 8 + 4, g = ((bin >> 5) & 31) * 8 + 4, b = (bin & 31) * 8 + 4;
+        let best = 0, bestDist = Infinity;
+        this.palette.forEach(([pr, pg, pb], i) => {
+            const d = (pr - r) ** 2 + (pg - g) ** 2 + (pb - b) ** 2;
+            if (d < bestDist) { bestDist = d; best = i; }
+        });
+        return (this.lookup[bin] = best);
+    }
+
+    async addFrame(ctx, index) {
+        const data = ctx.getImageData(0, 0, this.width, this.height).data;
+        if (!this.palette) this.writeHeader(data);
+        const { indices, lookup } = this;
+        for (let p = 0, i = 0; p < indices.length; p++, i += 4) {
+            const bin = rgbBin(data, i);
+            const hit = lookup[bin];
+            indices[p] = hit >= 0 ? hit : this.nearest(bin);
+        }
+        // 延时单位是 1/100 秒，按累计时间取整，避免帧率误差越积越多
+        const delay = Math.round((index + 1) * 100 / this.fps) - Math.round(index * 100 / this.fps);
+        const s = this.sink;
+        s.bytes([0x21, 0xf9, 0x04, 0x00, delay & 0xff, delay >> 8, 0x00, 0x00]);
+        s.byte(0x2c); s.u16(0); s.u16(0); s.u16(this.width); s.u16(this.height); s.byte(0);
+        this.writePixels(indices);
+    }
+
+    writePixels(indices) {
+        const s = this.sink;
+        const minCodeSize = Math.max(2, this.tableBits);
+        const clear = 1 << minCodeSize, end = clear + 1;
+        let codeSize = minCodeSize + 1, next = end + 1;
+        const block = new Uint8Array(255);
+        let blockLength = 0, acc = 0, bits = 0;
+        const flushBlock = () => {
+            s.byte(blockLength);
+            s.bytes(block.subarray(0, blockLength));
+            blockLength = 0;
+        };
+        const emit = (code) => {
+            acc |= code << bits;
+            bits += codeSize;
+            while (bits >= 8) {
+                block[blockLength++] = acc & 0xff;
+                if (blockLength === 255) flushBlock();
+                acc >>>= 8;
+                bits -= 8;
+            }
+            if (next > (1 << codeSize) - 1 && codeSize < 12) codeSize++;
+        };
+        const reset = () => { this.generation++; next = end + 1; codeSize = minCodeSize + 1; };
+
+        s.byte(minCodeSize);
+        reset();
+        emit(clear);
+        const { stamp, codes } = this;
+        let prefix = indices[0];
+        for (let p = 1; p < indices.length; p++) {
+            const key = (prefix << 8) | indices[p];
+            if (stamp[key] === this.generation) { prefix = codes[key]; continue; }
+            emit(prefix);
+            if (next < 4096) {
+                stamp[key] = this.generation;
+                codes[key] = next++;
+            } else {
+                // 字典满了：发清表码重新开始
+                emit(clear);
+                reset();
+            }
+            prefix = indices[p];
+        }
+        emit(prefix);
+        emit(end);
+        if (bits > 0) { block[blockLength++] = acc & 0xff; if (blockLength === 255) flushBlock(); }
+        if (blockLength) flushBlock();
+        s.byte(0);
+    }
+
+    async finish() {
+        this.sink.byte(0x3b);
+        return this.sink.toBlob(this.type);
+    }
+}
+
+// === WebM ===
+// 只写播放需要的最少元素：EBML 头、Segment（长度未知）、Info、Tracks，之后每个关键帧开一个 Cluster。
+// 一个 Cluster 的 SimpleBlock 攒齐后再整体写出，长度是确定的。
+function concatBytes(parts) {
+    const out = new Uint8Array(parts.reduce((n, p) => n + p.length, 0));
+    let offset = 0;
+    for (const p of parts) { out.set(p, offset); offset += p.length; }
+    return out;
+}
+
+function uintBytes(value, length) {
+    const out = new Uint8Array(length);
+    for (let i = length - 1; i >= 0; i--) { out[i] = value % 256; value = Math.floor(value / 256); }
+    return out;
+}
+
+function ebmlSize(n) {
+    for (let length = 1; length <= 7; length++) {
+        if (n < 2 ** (7 * length) - 1) {
+            const out = uintBytes(n, length);
+            out[0] |= 0x80 >> (length - 1);
+            return out;
+        }
+    }
+    throw new Error('element too large');
+}
+
+function ebml(id, payload) {
+    const idBytes = uintBytes(id, Math.ceil(Math.log2(id + 1) / 8));
+    return concatBytes([idBytes, ebmlSize(payload.length), payload]);
+}
+
+const ebmlUint = (id, value) => ebml(id, uintBytes(value, Math.max(1, Math.ceil(Math.log2(value + 1) / 8))));
+const ebmlString = (id, text) => ebml(id, new TextEncoder().encode(text));
+function ebmlFloat(id, value) {
+    const out = new Uint8Array(8);
+    new DataView(out.buffer).setFloat64(0, value);
+    return ebml(id, out);
+}
+
+const EBML_UNKNOWN_SIZE = Uint8Array.of(0x01, 0xff, 0xff, 0xff, 0xff, 0xff, 0xff, 0xff);
+
+class WebmWriter {
+    constructor(sink, width, height, duration) {
+        this.sink = sink;
+        this.cluster = null;
+        sink.bytes(ebml(0x1a45dfa3, concatBytes([
+            ebmlUint(0x4286, 1), ebmlUint(0x42f7, 1), ebmlUint(0x42f2, 4), ebmlUint(0x42f3, 8),
+            ebmlString(0x4282, 'webm'), ebmlUint(0x4287, 2), ebmlUint(0x4285, 2),
+        ])));
+        sink.bytes(concatBytes([uintBytes(0x18538067, 4), EBML_UNKNOWN_SIZE]));
+        sink.bytes(ebml(0x1549a966, concatBytes([
+            ebmlUint(0x2ad7b1, 1000000),  // 时间单位 1ms
+            ebmlString(0x4d80, 'passion'), ebmlString(0x5741, 'passion'),
+            ebmlFloat(0x4489, duration),
+        ])));
+        sink.bytes(ebml(0x1654ae6b, ebml(0xae, concatBytes([
+            ebmlUint(0xd7, 1), ebmlUint(0x73c5, 1), ebmlUint(0x83, 1), ebmlString(0x86, 'V_VP8'),
+            ebml(0xe0, concatBytes([ebmlUint(0xb0, width), ebmlUint(0xba, height)])),
+        ]))));
+    }
+
+    addChunk(chunk) {
+        const time = Math.round(chunk.timestamp / 1000);
+        const key = chunk.type === 'key';
+        // 块内时间是相对 Cluster 的 int16
+        if (key || !this.cluster || time - this.cluster.time > 32767) this.flushCluster(time);
+        const data = new Uint8Array(chunk.byteLength);
+        chunk.copyTo(data);
+        const relative = time - this.cluster.time;
+        const header = Uint8Array.of(0x81, (relative >> 8) & 0xff, relative & 0xff, key ? 0x80 : 0);
+        this.cluster.blocks.push(ebml(0xa3, concatBytes([header, data])));
+    }
+
+    flushCluster(nextTime) {
+        if (this.cluster) {
+            this.sink.bytes(ebml(0x1f43b675, concatBytes([ebmlUint(0xe7, this.cluster.time), ...this.cluster.blocks])));
+        }
+        this.cluster = nextTime === undefined ? null : { time: nextTime, blocks: [] };
+    }
+}
+
+class WebmEncoder {
+    // 不支持 WebCodecs 或这个配置时返回 null，由调用方退回 GIF
+    static async create(sink, width, height, fps, bitrate, frames) {
+        if (typeof VideoEncoder === 'undefined' || typeof VideoFrame === 'undefined') return null;
+        const config = { codec: 'vp8', width, height, bitrate, framerate: fps };
+        try {
+            if (!(await VideoEncoder.isConfigSupported(config)).supported) return null;
+        } catch (e) {
+            return null;
+        }
+        return new WebmEncoder(sink, config, frames * 1000 / fps);
+    }
+
+    constructor(sink, config, duration) {
+        this.sink = sink;
+        this.fps = config.framerate;
+        this.error = null;
+        this.writer = new WebmWriter(sink, config.width, config.height, duration);
+        this.encoder = new VideoEncoder({
+            output: (chunk) => this.writer.addChunk(chunk),
+            error: (e) => { this.error = e; },
+        });
+        this.encoder.configure(config);
+    }
+
+    get type() { return 'video/webm'; }
+
+    async addFrame(ctx, index) {
+        while (this.encoder.encodeQueueSize > ENCODE_QUEUE && !this.error) {
+            await new Promise(resolve => setTimeout(resolve, 1));
+        }
+        if (this.error) throw this.error;
+        const frame = new VideoFrame(ctx.canvas, {
+            timestamp: Math.round(index * 1e6 / this.fps),
+            duration: Math.round(1e6 / this.fps),
+        });
+        this.encoder.encode(frame, { keyFrame: index % Math.round(this.fps * KEYFRAME_SECONDS) === 0 });
+        frame.close();
+    }
+
+    async finish() {
+        await this.encoder.flush();
+        this.encoder.close();
+        if (this.error) throw this.error;
+        this.writer.flushCluster();
+        return this.sink.toBlob(this.type);
+    }
+}
+
+// 导出任务在 drawScene 的基础上多了：format ('gif' | 'webm')、seconds、fps、colors、bitrate、damping，
+// 每个 item 带 x, y, vx, vy, boxW, boxH（左上角、每步速度、布局尺寸，和 PhysicsWorld 的 add 指令一致）
+async function encodeAnimation(job, onProgress) {
+    // VP8 要求偶数宽高
+    const width = Math.max(2, Math.round(job.width * job.scale) & ~1);
+    const height = Math.max(2, Math.round(job.height * job.scale) & ~1);
+    const frames = Math.max(1, Math.round(job.seconds * job.fps));
+    const sink = new ByteSink();
+    const surface = createSurface(width, height);
+    const ctx = surface.getContext('2d', { willReadFrequently: job.format !== 'webm' });
+    let encoder = job.format === 'webm' ? await WebmEncoder.create(sink, width, height, job.fps, job.bitrate, frames) : null;
+    if (!encoder) encoder = new GifEncoder(sink, width, height, job.colors, job.fps);
+
+    const world = new PhysicsWorld(job.items.length);
+    world.apply({ type: 'bounds', width: job.width, height: job.height });
+    world.apply({ type: 'damping', damping: job.damping || 1 });
+    job.items.forEach((item, slot) => world.apply({
+        type: 'add', slot, x: item.x, y: item.y, vx: item.vx, vy: item.vy, w: item.boxW, h: item.boxH,
+    }));
+
+    let clock = 0;
+    for (let i = 0; i < frames; i++) {
+        job.items.forEach((item, slot) => {
+            item.cx = world.x[slot] + item.boxW / 2;
+            item.cy = world.y[slot] + item.boxH / 2;
+        });
+        drawScene(ctx, job);
+        await encoder.addFrame(ctx, i);
+        // 物理按固定步长推进，和页面上的速度一致
+        for (clock += 1000 / job.fps; clock >= PHYSICS_STEP_MS; clock -= PHYSICS_STEP_MS) world.step();
+        if (onProgress) onProgress((i + 1) / frames);
+        // 主线程兜底时也让页面有机会响应
+        await new Promise(resolve => setTimeout(resolve, 0));
+    }
+    return encoder.finish();
+}
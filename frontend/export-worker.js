@@ -0,0 +1,23 @@
+// === 导出 Worker 入口 ===
+// 运行时和 spatial-grid.js、physics.js、scene-draw.js、animation-export.js 拼成一个 Blob 启动（见 main.js 的 ExportClient）。
+// 收到的位图全部是转移过来的，画完即释放；PNG / 动图编码也在这里完成，不占主线程。
+// 动图导出过程中按帧回报进度：{ id, progress }。
+self.onmessage = async (e) => {
+    const { id, job } = e.data;
+    try {
+        let blob;
+        if (job.animation) {
+            blob = await encodeAnimation(job, progress => self.postMessage({ id, progress }));
+        } else {
+            const surface = new OffscreenCanvas(Math.round(job.width * job.scale), Math.round(job.height * job.scale));
+            drawScene(surface.getContext('2d'), job);
+            blob = await surface.convertToBlob({ type: 'image/png' });
+        }
+        self.postMessage({ id, blob });
+    } catch (err) {
+        self.postMessage({ id, error: String(err) });
+    } finally {
+        for (const item of job.items) item.image.close();
+        if (job.background.image) job.background.image.close();
+    }
+};
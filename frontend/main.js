@@ -0,0 +1,1113 @@
+const canvas = document.getElementById('meme-canvas');
+const textInput = document.getElementById('textInput');
+let floaters = [];
+
+// === 尺寸缓存：动画循环里不再读布局 ===
+// 画布尺寸由 ResizeObserver 维护；文字尺寸由渲染器缓存（见 renderers.js）
+let canvasW = canvas.clientWidth;
+let canvasH = canvas.clientHeight;
+new ResizeObserver((entries) => {
+    const rect = entries[entries.length - 1].contentRect;
+    if (rect.width === canvasW && rect.height === canvasH) return;
+    canvasW = rect.width;
+    canvasH = rect.height;
+    scheduleBackdrop();
+    wakeAnimation();
+}).observe(canvas);
+
+// Python 端注入的页面参数（见 template.py）
+const pageConfig = JSON.parse(document.getElementById('page-config').textContent);
+// 资源服务（字体子集、分词兜底、性能统计）在另一个端口上、只听本机，而且是纯 HTTP：
+// 没配对外地址时只有本机用 http 打开页面才连它，否则这些功能关掉（反向代理、容器、HTTPS 下连不上）
+const LOOPBACK_HOSTS = ['localhost', '127.0.0.1', '[::1]'];
+const assetOrigin = pageConfig.assetOrigin || (() => {
+    const page = new URL(document.baseURI);
+    if (!pageConfig.assetPort || page.protocol !== 'http:' || !LOOPBACK_HOSTS.includes(page.hostname)) return '';
+    return `http://${page.hostname}:${pageConfig.assetPort}`;
+})();
+// 背景图由 Streamlit 静态服务同源提供，相对路径加载（静态服务没开时是外链）
+const blissData = pageConfig.blissUrl;
+// CRT 效果：live 是画布整面 filter + 混合模式；baked 是背景预烘焙、文字换算颜色
+const crtBaked = pageConfig.crt === 'baked';
+const renderer = createRenderer(pageConfig.renderer, canvas, { crt: crtBaked });
+
+// === 物理线程 ===
+// 物理状态只存在 PhysicsWorld 的结构数组里（默认在 Worker 中），主线程只按帧批量发指令、取最新位置。
+// Worker 起不来时（不支持 / 被 CSP 拦截）退回到主线程里跑同一份 PhysicsWorld。
+class PhysicsClient {
+    constructor() {
+        this.commands = [];
+        this.seq = 0;
+        this.nextSlot = 0;
+        this.freeSlots = [];
+        this.width = -1;
+        this.height = -1;
+        this.positions = null;
+        this.positionsSeq = -1;
+        this.positionsCount = 0;
+        this.workerMoving = false;
+        this.running = true;
+        this.damping = 1;
+        this.world = null;
+        this.worker = null;
+        try { this.worker = this.spawnWorker(); } catch (e) { this.worker = null; }
+        if (!this.worker) this.useLocalWorld();
+    }
+
+    spawnWorker() {
+        if (typeof Worker === 'undefined') return null;
+        const source = ['spatial-grid-src', 'physics-src', 'physics-worker-src']
+            .map(id => document.getElementById(id).textContent).join('\n');
+        if (!source.includes('PhysicsWorld')) return null;
+        const worker = new Worker(URL.createObjectURL(new Blob([source], { type: 'text/javascript' })));
+        worker.onmessage = (e) => this.receive(e.data);
+        worker.onerror = () => { worker.terminate(); this.worker = null; this.useLocalWorld(); };
+        return worker;
+    }
+
+    // 切到主线程模式时按当前画面重建物理状态
+    useLocalWorld() {
+        this.world = new PhysicsWorld();
+        this.stepper = new FixedStepper();
+        this.commands = [];
+        this.world.apply({ type: 'bounds', width: this.width, height: this.height });
+        this.world.apply({ type: 'damping', damping: this.damping });
+        for (const f of floaters) this.world.apply(this.addCommand(f));
+    }
+
+    send(cmd) {
+        if (this.world) this.world.apply(cmd);
+        else this.commands.push(cmd);
+    }
+
+    // 一帧内的指令合成一条消息发给 Worker
+    flush() {
+        if (!this.worker || this.commands.length === 0) return;
+        this.seq++;
+        this.worker.postMessage({ type: 'batch', seq: this.seq, commands: this.commands });
+        this.commands = [];
+    }
+
+    addCommand(f) {
+        return { type: 'add', slot: f.slot, x: f.x, y: f.y, vx: f.vx, vy: f.vy, w: f.w, h: f.h };
+    }
+
+    add(f) {
+        f.slot = this.freeSlots.length ? this.freeSlots.pop() : this.nextSlot++;
+        // 槽位可能被复用：只有 Worker 处理过这次 add 之后发回的位置才属于这个文字
+        f.spawnSeq = this.seq + 1;
+        f.sentW = f.w; f.sentH = f.h;
+        this.send(this.addCommand(f));
+    }
+
+    remove(f) {
+        this.send({ type: 'remove', slot: f.slot });
+        this.freeSlots.push(f.slot);
+    }
+
+    clear() {
+        this.send({ type: 'clear' });
+        this.nextSlot = 0;
+        this.freeSlots = [];
+    }
+
+    setDamping(damping) {
+        this.damping = damping;
+        this.send({ type: 'damping', damping });
+    }
+
+    // 页面隐藏或滚出视口时连物理一起停下
+    setRunning(running) {
+        if (running === this.running) return;
+        this.running = running;
+        if (this.worker) this.worker.postMessage({ type: 'run', running });
+        else if (running) this.stepper.last = null;
+    }
+
+    // 还有没有东西在动：Worker 模式下，已发出但还没确认的指令也算在动
+    get moving() {
+        if (this.world) return this.world.awake > 0;
+        return this.commands.length > 0 || this.positionsSeq < this.seq || this.workerMoving;
+    }
+
+    setBounds(width, height) {
+        if (width === this.width && height === this.height) return;
+        this.width = width; this.height = height;
+        this.send({ type: 'bounds', width, height });
+    }
+
+    syncSizes(list) {
+        for (const f of list) {
+            if (f.w === f.sentW && f.h === f.sentH) continue;
+            f.sentW = f.w; f.sentH = f.h;
+            this.send({ type: 'resize', slot: f.slot, w: f.w, h: f.h });
+        }
+    }
+
+    receive(msg) {
+        if (msg.type !== 'positions') return;
+        // 上一块缓冲区还给 Worker 复用，避免每帧分配
+        if (this.positions) this.worker.postMessage({ type: 'recycle', buffer: this.positions }, [this.positions.buffer]);
+        this.positions = msg.buffer;
+        this.positionsSeq = msg.seq;
+        this.positionsCount = msg.count;
+        this.workerMoving = msg.moving;
+        // 动画循环可能已经停了，最后一批位置也要画出来
+        wakeAnimation();
+    }
+
+    tick(now) {
+        if (this.world && this.running) this.stepper.advance(now, () => this.world.step());
+    }
+
+    applyPositions(list) {
+        if (this.world) {
+            for (const f of list) { f.x = this.world.x[f.slot]; f.y = this.world.y[f.slot]; }
+            return;
+        }
+        const positions = this.positions;
+        if (!positions) return;
+        for (const f of list) {
+            if (f.slot >= this.positionsCount || this.positionsSeq < f.spawnSeq) continue;
+            f.x = positions[f.slot * 2];
+            f.y = positions[f.slot * 2 + 1];
+        }
+    }
+}
+
+const physics = new PhysicsClient();
+
+// 背景渐变用结构化描述保存，CSS 和 Canvas（导出）都从这里生成
+const highSatGradients = [
+    { type: 'linear', angle: 180, stops: [['#FF0000', 0], ['#FF7F00', 0.15], ['#FFFF00', 0.3], ['#00FF00', 0.5], ['#0000FF', 0.7], ['#4B0082', 0.85], ['#9400D3', 1]] },
+    { type: 'linear', angle: 45, stops: [['#FF0000'], ['#FFFF00'], ['#0000FF'], ['#FF0000']] },
+    { type: 'linear', angle: 135, stops: [['#FF00CC', 0], ['#333399', 1]] },
+    { type: 'linear', angle: 90, stops: [['#00FF00'], ['#FF00FF'], ['#00FFFF'], ['#FFFF00']] },
+    { type: 'radial', stops: [['#FFFF00', 0], ['#FF0000', 1]] },
+    { type: 'linear', angle: 120, stops: [['#e4ff00', 0], ['#ff0055', 0.5], ['#00ccff', 1]] },
+    { type: 'linear', corner: 'bottom right', stops: [['#2C3E50'], ['#FD746C']] },
+    { type: 'linear', angle: 180, stops: [['#00F260'], ['#0575E6']] },
+];
+
+// 当前背景：{ kind: 'color', color } / { kind: 'gradient', spec } / { kind: 'image', url }
+let background = { kind: 'color', color: '#ffffff' };
+
+let rainbowClickCount = 0;
+
+// === 分词 ===
+// 整页只建一个 Intl.Segmenter，结果按文字缓存。浏览器没有 Intl.Segmenter 时请服务端分词
+// （jieba，见 segmentation.py），都不行才逐字切。长文本分块处理，块之间让出主线程；
+// 逐字切出来的一次最多 MAX_FALLBACK_CHARS 个，免得一段长中文变成几百个单字。
+const SEGMENT_CHUNK = 200;
+const SEGMENT_CACHE_SIZE = 256;
+const MAX_FALLBACK_CHARS = 150;
+const segmentCache = new Map();
+let wordSegmenter;
+
+function nextTask() { return new Promise(resolve => setTimeout(resolve, 0)); }
+
+function localSegmenter() {
+    if (wordSegmenter === undefined) {
+        try { wordSegmenter = new Intl.Segmenter('zh-CN', { granularity: 'word' }); }
+        catch (e) { wordSegmenter = null; }
+    }
+    return wordSegmenter;
+}
+
+// 尽量在标点处断开，单块不超过 SEGMENT_CHUNK 个字符
+function splitChunks(text) {
+    const chunks = [];
+    let start = 0;
+    while (start < text.length) {
+        let end = Math.min(text.length, start + SEGMENT_CHUNK);
+        if (end < text.length) {
+            const cut = text.slice(start, end).search(/[，。！？；、,.!?;][^，。！？；、,.!?;]*$/);
+            if (cut > 0) end = start + cut + 1;
+        }
+        chunks.push(text.slice(start, end));
+        start = end;
+    }
+    return chunks;
+}
+
+// 返回 { words, chars }，chars 为真表示是逐字切的
+async function segmentChunk(chunk) {
+    if (segmentCache.has(chunk)) {
+        const result = segmentCache.get(chunk);
+        segmentCache.delete(chunk);
+        segmentCache.set(chunk, result);
+        return result;
+    }
+    const segmenter = localSegmenter();
+    let result;
+    if (segmenter) {
+        result = { words: Array.from(segmenter.segment(chunk), s => s.segment).filter(s => s.trim().length > 0), chars: false };
+    } else {
+        result = await fetchSegments(chunk).then(
+            words => ({ words, chars: false }),
+            () => ({ words: Array.from(chunk).filter(c => c.trim().length > 0), chars: true }));
+    }
+    segmentCache.set(chunk, result);
+    if (segmentCache.size > SEGMENT_CACHE_SIZE) segmentCache.delete(segmentCache.keys().next().value);
+    return result;
+}
+
+async function fetchSegments(chunk) {
+    if (!pageConfig.segmentService || !assetOrigin) throw new Error('no segment service');
+    const response = await fetch(`${assetOrigin}/segment.json?text=${encodeURIComponent(chunk)}`);
+    const words = response.ok ? await response.json() : null;
+    if (!Array.isArray(words)) throw new Error(`segment ${response.status}`);
+    return words;
+}
+
+async function segmentText(text) {
+    text = text.trim();
+    if (!text) return [];
+    if (text.includes(' ')) return text.split(/\s+/).filter(w => w.length > 0);
+    const words = [];
+    let chars = 0;
+    for (const chunk of splitChunks(text)) {
+        const result = await segmentChunk(chunk);
+        if (result.chars) {
+            const taken = result.words.slice(0, MAX_FALLBACK_CHARS - chars);
+            words.push(...taken);
+            chars += taken.length;
+            if (chars >= MAX_FALLBACK_CHARS) break;
+        } else {
+            words.push(...result.words);
+        }
+        await nextTask();
+    }
+    return words;
+}
+
+class Floater {
+    constructor(text, style, x, y, vx, vy) {
+        this.element = null;
+        this.reset(text, style, x, y, vx, vy);
+    }
+
+    // 新建和从对象池里取出来走同一条路：挂上元素、上样式、加进物理
+    reset(text, style, x, y, vx, vy) {
+        this.text = text;
+        this.x = x; this.y = y;
+        this.vx = vx; this.vy = vy;
+        this.w = 0; this.h = 0;
+        this.exportRaster = null;
+        this.exportStyle = null;
+
+        renderer.mount(this);
+        this.setStyle(style);
+        physics.add(this);
+    }
+
+    setStyle(style) {
+        this.style = style;
+        renderer.applyStyle(this);
+    }
+
+    applyRandomStyle() {
+        this.setStyle(createRandomStyle(canvasScale(canvasW)));
+    }
+}
+
+// === 对象池 ===
+// 删掉的文字对象留着复用（DOM 元素的池在 DomRenderer 里），连点 ADD TEXT / CLEAR 时不反复分配，也不给 GC 攒垃圾。
+// 每个池最多留 POOL_SIZE 个，多出来的交给 GC
+const POOL_SIZE = 150;
+const floaterPool = [];
+
+function createFloater(text, style, x, y, vx, vy) {
+    const floater = floaterPool.pop();
+    if (!floater) return new Floater(text, style, x, y, vx, vy);
+    floater.reset(text, style, x, y, vx, vy);
+    return floater;
+}
+
+// 调用方负责把它从 floaters 和物理里去掉
+function recycleFloater(floater) {
+    renderer.unmount(floater);
+    if (floaterPool.length < POOL_SIZE) floaterPool.push(floater);
+}
+
+// 新文字按网格铺开再加一点抖动；随机数按 样式 → 位置 → 速度 的顺序抽（和 render.py 的 build_scene 一致）
+function spawnFloater(text, index, total) {
+    const scale = canvasScale(canvasW);
+    const style = createRandomStyle(scale);
+
+    const safeMargin = 60 * scale; 
+    const availableWidth = canvasW - (100 * scale) - safeMargin * 2;
+    const availableHeight = canvasH - (100 * scale) - safeMargin * 2;
+
+    const cols = Math.ceil(Math.sqrt(total));
+    const rows = Math.ceil(total / cols);
+    const col = index % cols;
+    const row = Math.floor(index / cols);
+    const cellWidth = availableWidth / cols;
+    const cellHeight = availableHeight / rows;
+    let baseX = safeMargin + col * cellWidth;
+    let baseY = safeMargin + row * cellHeight;
+    const jitterX = random() * (cellWidth * 0.6);
+    const jitterY = random() * (cellHeight * 0.6);
+
+    const vx = (random() - 0.5) * 0.5; 
+    const vy = (random() - 0.5) * 0.5;
+    return createFloater(text, style, baseX + jitterX, baseY + jitterY, vx, vy);
+}
+
+// === 字体预加载 ===
+// 服务端有字体文件的家族（pageConfig.fonts，见 fonts.py）按当前文字里还没加载过的字符子集化成 WOFF2。
+// 每个子集注册成一个只覆盖这些字符的 FontFace，生成文字前先等它们加载完，避免动画中途换字体重排。
+const FONT_LOAD_TIMEOUT = 400;
+const fontGlyphs = new Map();  // 家族 → 已请求过的字符
+
+function unicodeRange(chars) {
+    return chars.map(c => `U+${c.codePointAt(0).toString(16)}`).join(', ');
+}
+
+function loadFonts(text) {
+    const families = pageConfig.fonts || [];
+    if (!families.length || !assetOrigin || typeof FontFace === 'undefined') return Promise.resolve();
+    const chars = Array.from(new Set(Array.from(text.replace(/\s/g, ''))));
+    const loads = [];
+    for (const family of families) {
+        if (!fontGlyphs.has(family)) fontGlyphs.set(family, new Set());
+        const loaded = fontGlyphs.get(family);
+        const missing = chars.filter(c => !loaded.has(c)).sort();
+        if (!missing.length) continue;
+        missing.forEach(c => loaded.add(c));
+        const url = `${assetOrigin}/font.woff2?family=${encodeURIComponent(family)}&text=${encodeURIComponent(missing.join(''))}`;
+        const face = new FontFace(family, `url(${url}) format('woff2')`, { weight: '900', unicodeRange: unicodeRange(missing) });
+        document.fonts.add(face);
+        // 加载失败就撤掉，退回系统字体
+        loads.push(face.load().catch(() => document.fonts.delete(face)));
+    }
+    if (!loads.length) return Promise.resolve();
+    // 字体服务太慢时不无限等，最多晚一点点出字
+    return Promise.race([Promise.all(loads), new Promise(resolve => setTimeout(resolve, FONT_LOAD_TIMEOUT))]);
+}
+
+function spawnSentence() {
+    const text = textInput.value;
+    textInput.value = '';
+    loadFonts(text).then(() => spawnWords(text));
+}
+
+// 每帧最多新建这么多个，长句子分几帧铺开，不卡住动画
+const SPAWN_BATCH = 12;
+
+function nextFrame() { return new Promise(resolve => requestAnimationFrame(resolve)); }
+
+async function spawnWords(text) {
+    const words = await segmentText(text);
+    // 带种子时每个场景从同一个随机序列开始，同样的文字总是同样的排布和样式
+    if (runOptions.seed != null) seedRandom(runOptions.seed);
+    const total = words.length;
+    for (let start = 0; start < total; start += SPAWN_BATCH) {
+        if (start > 0) await nextFrame();
+        // 一批元素攒在 DocumentFragment 里一次插入；这里不读布局，尺寸留给下一帧 animate() 的读阶段统一取
+        renderer.batch(() => {
+            words.slice(start, start + SPAWN_BATCH).forEach((w, k) => floaters.push(spawnFloater(w, start + k, total)));
+        });
+        wakeAnimation();
+    }
+    sceneSync.schedule();
+}
+
+// 连点几次也只在下一帧统一换一次，所有写操作落在同一帧里
+let restylePending = false;
+function restyleAll() {
+    restylePending = true;
+    wakeAnimation();
+}
+
+function removeFloater(floater) {
+    const index = floaters.indexOf(floater);
+    // 已经回收过的不能再还一次槽位
+    if (index === -1) return;
+    floaters.splice(index, 1);
+    physics.remove(floater);
+    recycleFloater(floater);
+    wakeAnimation();
+    sceneSync.schedule();
+}
+
+function clearCanvas() { floaters.forEach(recycleFloater); floaters = []; physics.clear(); wakeAnimation(); sceneSync.schedule(); }
+
+function setHighSatRainbow() {
+    let gradient;
+    if (rainbowClickCount === 0) {
+        gradient = highSatGradients[0];
+    } else {
+        gradient = highSatGradients[Math.floor(random() * highSatGradients.length)];
+    }
+    rainbowClickCount++;
+    applyBackground({ kind: 'gradient', spec: gradient });
+}
+
+function applyBackground(next) {
+    background = next;
+    // 预烘焙模式下背景已经画在底层画布里，CSS 背景只在第一次烘焙好之前顶一下，之后不再画这一层
+    if (!backdropPainted) {
+        if (next.kind === 'gradient') {
+            canvas.style.background = gradientCSS(next.spec);
+            canvas.style.backgroundSize = "cover";
+        } else if (next.kind === 'image') {
+            canvas.style.background = `url('${next.url}') center/cover no-repeat`;
+        } else {
+            canvas.style.background = next.color;
+        }
+    }
+    scheduleBackdrop();
+    sceneSync.schedule();
+}
+
+// === CRT 预烘焙背景 ===
+// 背景、扫描线和对比度/亮度一次画进底层画布；之后每帧只合成文字，没有整面滤镜和混合。
+// 只在换背景或画布尺寸变化时重画。
+const BACKDROP_DELAY = 100;
+let backdrop = null;
+let backdropTimer = 0;
+let backdropToken = 0;
+let backdropPainted = false;
+
+if (crtBaked) {
+    canvas.classList.add('crt-baked');
+    backdrop = document.createElement('canvas');
+    backdrop.className = 'crt-backdrop';
+    canvas.appendChild(backdrop);
+}
+
+function scheduleBackdrop() {
+    if (!backdrop) return;
+    clearTimeout(backdropTimer);
+    backdropTimer = setTimeout(bakeBackdrop, BACKDROP_DELAY);
+}
+
+async function bakeBackdrop() {
+    const token = ++backdropToken;
+    const bg = background.kind === 'image'
+        ? { kind: 'image', image: await loadBackgroundImage(background.url).catch(() => null) }
+        : background;
+    // 等图片解码的时候背景又换了
+    if (token !== backdropToken) {
+        if (bg.image) bg.image.close();
+        return;
+    }
+    const dpr = window.devicePixelRatio || 1;
+    backdrop.width = Math.round(canvasW * dpr);
+    backdrop.height = Math.round(canvasH * dpr);
+    const ctx = backdrop.getContext('2d');
+    ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+    drawBackground(ctx, bg, canvasW, canvasH);
+    drawScanlines(ctx, canvasW, canvasH);
+    ctx.setTransform(1, 0, 0, 1, 0, 0);
+    bakeCRT(ctx, backdrop.width, backdrop.height);
+    if (bg.image) bg.image.close();
+    if (!backdropPainted) {
+        backdropPainted = true;
+        canvas.style.background = 'none';
+    }
+}
+
+function setBg(type) {
+    if (type === 'white') applyBackground({ kind: 'color', color: '#ffffff' });
+    else if (type === 'win98') applyBackground({ kind: 'color', color: '#008080' });
+    else if (type === 'bliss') applyBackground({ kind: 'image', url: blissData });
+}
+
+// === 导出 ===
+// 直接按文字状态和当前背景合成，不再遍历 DOM；合成和 PNG 编码放在 Worker 里的 OffscreenCanvas 上。
+// Worker 或 OffscreenCanvas 不可用时在主线程用同一份 drawScene 兜底。
+const EXPORT_SCALE = 2;
+// 动图：时长固定，清晰度 / 体积按档位取倍率、帧率、GIF 颜色数和 WebM 码率
+const ANIMATION_SECONDS = 4;
+const ANIMATION_QUALITY = {
+    small: { scale: 0.5, fps: 10, colors: 32, bitrate: 300000 },
+    medium: { scale: 1, fps: 15, colors: 128, bitrate: 1000000 },
+    large: { scale: 2, fps: 30, colors: 256, bitrate: 4000000 },
+};
+
+// 页面里内联的 Worker 源码拼成 Blob 启动；每个请求带 id，回复按 id 对应回 Promise，
+// 带 progress 的回复只是进度，交给请求时传入的回调
+class WorkerClient {
+    constructor(sourceIds) {
+        this.pending = new Map();
+        this.nextId = 0;
+        this.worker = null;
+        try { this.worker = this.spawnWorker(sourceIds); } catch (e) { this.worker = null; }
+    }
+
+    spawnWorker(sourceIds) {
+        if (typeof Worker === 'undefined' || typeof OffscreenCanvas === 'undefined') return null;
+        const source = sourceIds.map(id => document.getElementById(id).textContent).join('\n');
+        if (!source.includes('self.onmessage')) return null;
+        const worker = new Worker(URL.createObjectURL(new Blob([source], { type: 'text/javascript' })));
+        worker.onmessage = (e) => {
+            const { id, blob, error, progress } = e.data;
+            const job = this.pending.get(id);
+            if (progress !== undefined) {
+                if (job && job.onProgress) job.onProgress(progress);
+                return;
+            }
+            this.pending.delete(id);
+            if (job) error ? job.reject(new Error(error)) : job.resolve(blob);
+        };
+        // Worker 崩了就不再用它：等着的任务全部失败，调用方自己退回主线程
+        worker.onerror = () => {
+            worker.terminate();
+            this.worker = null;
+            const failed = [...this.pending.values()];
+            this.pending.clear();
+            failed.forEach(job => job.reject(new Error('worker failed')));
+        };
+        return worker;
+    }
+
+    call(message, transfer = [], onProgress = null) {
+        const id = this.nextId++;
+        return new Promise((resolve, reject) => {
+            this.pending.set(id, { resolve, reject, onProgress });
+            this.worker.postMessage({ id, ...message }, transfer);
+        });
+    }
+}
+
+class ExportClient extends WorkerClient {
+    constructor() { super(['spatial-grid-src', 'physics-src', 'scene-draw-src', 'animation-export-src', 'export-worker-src']); }
+
+    // job.animation 为真时导出动图（见 animation-export.js），onProgress 收到 0~1 的进度
+    render(job, onProgress = null) {
+        if (!this.worker) return job.animation ? encodeAnimation(job, onProgress) : this.renderLocal(job);
+        const transfer = job.items.map(item => item.image);
+        if (job.background.image) transfer.push(job.background.image);
+        return this.call({ job }, transfer, onProgress);
+    }
+
+    renderLocal(job) {
+        const surface = createSurface(Math.round(job.width * job.scale), Math.round(job.height * job.scale));
+        drawScene(surface.getContext('2d'), job);
+        if (surface.convertToBlob) return surface.convertToBlob({ type: 'image/png' });
+        return new Promise(resolve => surface.toBlob(resolve, 'image/png'));
+    }
+}
+
+const exporter = new ExportClient();
+const backgroundImages = new Map();
+
+// 背景图解码一次后按 URL 缓存；每次导出给 Worker 一份拷贝（转移后原位图会失效）
+function loadBackgroundImage(url) {
+    if (!backgroundImages.has(url)) {
+        backgroundImages.set(url, fetch(url).then(r => r.blob()).then(blob => createImageBitmap(blob)));
+    }
+    return backgroundImages.get(url).then(image => createImageBitmap(image));
+}
+
+// 文字位图按导出倍率栅格化，样式不变就复用
+function exportRaster(f) {
+    if (f.exportStyle !== f.style) {
+        f.exportRaster = rasterizeText(f.text, renderer.paintStyle(f.style), EXPORT_SCALE);
+        f.exportStyle = f.style;
+    }
+    return f.exportRaster;
+}
+
+// 当前场景的导出任务；动图导出额外用到每个文字的位置、速度和布局尺寸
+async function exportJob(scale) {
+    const items = await Promise.all(floaters.map(async (f) => {
+        const raster = exportRaster(f);
+        const s = f.style;
+        // 先把字段取好：等位图的时候这个文字可能已经被删掉、回收给别的词用了
+        const item = {
+            cx: f.x + f.w / 2, cy: f.y + f.h / 2, w: raster.w, h: raster.h, bleed: raster.bleed,
+            scaleX: s.scaleX, scaleY: s.scaleY, skew: s.skew, rotate: s.rotate,
+            x: f.x, y: f.y, vx: f.vx, vy: f.vy, boxW: f.w, boxH: f.h,
+        };
+        item.image = await createImageBitmap(raster.image);
+        return item;
+    }));
+    let bg;
+    if (backdrop) {
+        bg = { kind: 'image', image: await createImageBitmap(backdrop), baked: true };
+    } else if (background.kind === 'image') {
+        bg = { kind: 'image', image: await loadBackgroundImage(background.url).catch(() => null) };
+    } else {
+        bg = background;
+    }
+    return { width: canvasW, height: canvasH, scale, background: bg, items };
+}
+
+function downloadBlob(blob, name) {
+    const link = document.createElement('a');
+    link.download = name;
+    link.href = URL.createObjectURL(blob);
+    link.click();
+    setTimeout(() => URL.revokeObjectURL(link.href), 1000);
+}
+
+// 交给 Worker 的任务如果因为 Worker 崩溃失败，位图已经转移走了，重新生成一份在主线程画
+async function renderExport(makeJob, onProgress = null) {
+    const viaWorker = Boolean(exporter.worker);
+    try {
+        return await exporter.render(await makeJob(), onProgress);
+    } catch (err) {
+        if (!viaWorker || exporter.worker) throw err;
+        return exporter.render(await makeJob(), onProgress);
+    }
+}
+
+let memeExporting = false;
+
+async function exportMeme() {
+    if (memeExporting) return;
+    memeExporting = true;
+    const started = performance.now();
+    try {
+        const blob = await renderExport(() => exportJob(EXPORT_SCALE));
+        perf.exported(performance.now() - started);
+        downloadBlob(blob, 'passion-meme.png');
+    } finally {
+        memeExporting = false;
+    }
+}
+
+// 动图从当前画面开始，用同一套物理推进 ANIMATION_SECONDS 秒，边画边编码；
+// 浏览器不支持 WebCodecs 时 WebM 会退回 GIF，文件扩展名按实际格式来
+let animationExporting = false;
+
+async function exportAnimation(format, button) {
+    if (animationExporting) return;
+    animationExporting = true;
+    const label = button.textContent;
+    const quality = ANIMATION_QUALITY[document.getElementById('export-quality').value] || ANIMATION_QUALITY.medium;
+    const started = performance.now();
+    try {
+        const makeJob = async () => Object.assign(await exportJob(quality.scale), {
+            animation: true, format, seconds: ANIMATION_SECONDS, damping: physics.damping,
+            fps: quality.fps, colors: quality.colors, bitrate: quality.bitrate,
+        });
+        const blob = await renderExport(makeJob, (progress) => {
+            button.textContent = `⏳ ${Math.round(progress * 100)}%`;
+        });
+        perf.exported(performance.now() - started);
+        downloadBlob(blob, `passion-meme.${blob.type === 'video/webm' ? 'webm' : 'gif'}`);
+    } finally {
+        animationExporting = false;
+        button.textContent = label;
+    }
+}
+
+if (typeof VideoEncoder === 'undefined') document.getElementById('export-webm').style.display = 'none';
+
+// === 上传背景 ===
+// 原图不进样式系统：在 Worker 里缩到画布像素尺寸 × devicePixelRatio 并转成 WebP/JPEG，
+// 结果按内容哈希 + 目标尺寸缓存成 object URL，同一张图重复上传直接复用。
+const UPLOAD_CACHE_SIZE = 8;
+
+class UploadClient extends WorkerClient {
+    constructor() { super(['scene-draw-src', 'upload-worker-src']); }
+
+    transcode(file, width, height) {
+        if (!this.worker) return transcodeImage(file, width, height);
+        return this.call({ file, width, height }).catch((err) => {
+            if (this.worker) throw err;
+            return transcodeImage(file, width, height);
+        });
+    }
+}
+
+const uploader = new UploadClient();
+const uploadCache = new Map();
+
+async function contentHash(file) {
+    // crypto.subtle 只在安全上下文可用，否则退回文件元信息
+    if (!(window.crypto && crypto.subtle)) return `${file.name}:${file.size}:${file.lastModified}`;
+    const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+}
+
+async function prepareUpload(file) {
+    const dpr = window.devicePixelRatio || 1;
+    const width = Math.round(canvasW * dpr), height = Math.round(canvasH * dpr);
+    const key = `${await contentHash(file)}@${width}x${height}`;
+    let entry = uploadCache.get(key);
+    if (entry) {
+        uploadCache.delete(key);
+    } else {
+        entry = uploader.transcode(file, width, height).then(blob => URL.createObjectURL(blob));
+        entry.catch(() => uploadCache.delete(key));
+    }
+    uploadCache.set(key, entry);
+    // 超出数量时淘汰最久没用的，正在当背景的那张保留
+    for (const [oldKey, oldEntry] of uploadCache) {
+        if (uploadCache.size <= UPLOAD_CACHE_SIZE) break;
+        uploadCache.delete(oldKey);
+        oldEntry.then(url => {
+            if (background.url === url) return;
+            URL.revokeObjectURL(url);
+            backgroundImages.delete(url);
+        }, () => {});
+    }
+    return entry;
+}
+
+document.getElementById('file-input').addEventListener('change', async (e) => {
+    const file = e.target.files[0];
+    if (!file) return;
+    // 清空后再次选择同一个文件也能触发 change
+    e.target.value = '';
+    let url;
+    try {
+        url = await prepareUpload(file);
+    } catch (err) {
+        // 浏览器解码不了时直接引用原文件，至少不再转成 data URL 字符串
+        url = URL.createObjectURL(file);
+    }
+    applyBackground({ kind: 'image', url });
+});
+
+// === 性能统计 ===
+// 帧间隔（按直方图分档）、animate() 耗时、长任务、导出耗时。资源服务在时每 METRICS_INTERVAL 把这段时间的计数
+// 报给 Python（见 metrics.py），按会话汇总；?hud=1 时画面左上角叠一层实时数值。
+const METRICS_INTERVAL = 10000;
+const HUD_INTERVAL = 500;
+// 帧间隔分档上限（ms），最后一档是 100ms 以上；和 metrics.py 的 FRAME_BUCKETS 一致
+const FRAME_BUCKETS = [8, 17, 25, 34, 50, 100];
+// 超过这个间隔说明循环中间停过（静止、隐藏），不算一帧
+const FRAME_GAP = 250;
+
+class PerfMetrics {
+    constructor() {
+        this.session = Math.random().toString(36).slice(2);
+        this.lastFrame = -Infinity;
+        this.recent = [];           // HUD 用的最近帧间隔
+        this.animateAvg = 0;        // HUD 用的 animate() 耗时滑动平均
+        this.reset();
+        if (typeof PerformanceObserver !== 'undefined' && (PerformanceObserver.supportedEntryTypes || []).includes('longtask')) {
+            new PerformanceObserver((list) => {
+                for (const entry of list.getEntries()) { this.longTasks++; this.longTaskMs += entry.duration; }
+            }).observe({ entryTypes: ['longtask'] });
+        }
+    }
+
+    reset() {
+        this.started = performance.now();
+        this.frames = 0; this.frameMs = 0; this.frameMax = 0;
+        this.frameBuckets = new Array(FRAME_BUCKETS.length + 1).fill(0);
+        this.animateMs = 0; this.animateMax = 0;
+        this.longTasks = 0; this.longTaskMs = 0;
+        this.exports = 0; this.exportMs = 0; this.exportMax = 0;
+    }
+
+    frame(now, animateMs) {
+        this.animateMs += animateMs;
+        this.animateMax = Math.max(this.animateMax, animateMs);
+        this.animateAvg += (animateMs - this.animateAvg) * 0.1;
+        const interval = now - this.lastFrame;
+        this.lastFrame = now;
+        if (interval > FRAME_GAP) return;
+        this.frames++;
+        this.frameMs += interval;
+        this.frameMax = Math.max(this.frameMax, interval);
+        let bucket = FRAME_BUCKETS.findIndex(limit => interval <= limit);
+        this.frameBuckets[bucket === -1 ? FRAME_BUCKETS.length : bucket]++;
+        this.recent.push(interval);
+        if (this.recent.length > 60) this.recent.shift();
+    }
+
+    exported(ms) {
+        this.exports++;
+        this.exportMs += ms;
+        this.exportMax = Math.max(this.exportMax, ms);
+        this.lastExport = ms;
+    }
+
+    // 这段时间什么都没发生就不报
+    report() {
+        if (!pageConfig.metrics || !assetOrigin || !(this.frames || this.exports || this.longTasks)) return;
+        const body = JSON.stringify({
+            session: this.session, renderer: pageConfig.renderer, floaters: floaters.length,
+            interval: Math.round(performance.now() - this.started),
+            frames: this.frames, frameMs: this.frameMs, frameMax: this.frameMax, frameBuckets: this.frameBuckets,
+            animateMs: this.animateMs, animateMax: this.animateMax,
+            longTasks: this.longTasks, longTaskMs: this.longTaskMs,
+            exports: this.exports, exportMs: this.exportMs, exportMax: this.exportMax,
+        });
+        this.reset();
+        // text/plain 不触发跨域预检；页面关掉时 sendBeacon 也能发出去
+        const url = `${assetOrigin}/metrics`;
+        const blob = new Blob([body], { type: 'text/plain' });
+        if (!(navigator.sendBeacon && navigator.sendBeacon(url, blob))) {
+            fetch(url, { method: 'POST', body: blob, keepalive: true }).catch(() => {});
+        }
+    }
+
+    hudText() {
+        const recent = this.recent;
+        const mean = recent.length ? recent.reduce((a, b) => a + b, 0) / recent.length : 0;
+        const worst = recent.length ? Math.max(...recent) : 0;
+        return [
+            scheduler.handle ? `${mean ? (1000 / mean).toFixed(0) : '--'} fps  ${mean.toFixed(1)} / ${worst.toFixed(1)} ms` : 'idle',
+            `animate ${this.animateAvg.toFixed(2)} ms`,
+            `floaters ${floaters.length}`,
+            `long tasks ${this.longTasks} (${this.longTaskMs.toFixed(0)} ms)`,
+            `export ${this.lastExport == null ? '--' : `${this.lastExport.toFixed(0)} ms`}`,
+        ].join('\n');
+    }
+}
+
+const perf = new PerfMetrics();
+setInterval(() => perf.report(), METRICS_INTERVAL);
+document.addEventListener('visibilitychange', () => { if (document.hidden) perf.report(); });
+
+let hud = null;
+let hudTimer = 0;
+
+function setHud(on) {
+    if (on === Boolean(hud)) return;
+    if (on) {
+        hud = document.createElement('pre');
+        hud.className = 'perf-hud';
+        canvas.parentNode.appendChild(hud);
+        hudTimer = setInterval(() => { hud.textContent = perf.hudText(); }, HUD_INTERVAL);
+    } else {
+        clearInterval(hudTimer);
+        hud.remove();
+        hud = null;
+    }
+}
+
+// === 动画调度 ===
+// 只在有东西要画时才跑 requestAnimationFrame：页面隐藏、iframe 滚出视口、场景全部静止时停下，
+// 生成、换样式、删除、尺寸变化时再唤醒。runOptions.fps 可以限制帧率（0 表示跟随显示器刷新率）。
+class FrameScheduler {
+    constructor(frame) {
+        this.frame = frame;
+        this.interval = 0;
+        this.handle = 0;
+        this.last = -Infinity;
+        this.inView = true;
+        this.loop = this.loop.bind(this);
+        document.addEventListener('visibilitychange', () => this.update());
+        if (typeof IntersectionObserver !== 'undefined') {
+            new IntersectionObserver((entries) => {
+                this.inView = entries[entries.length - 1].isIntersecting;
+                this.update();
+            }).observe(canvas);
+        }
+    }
+
+    get active() { return !document.hidden && this.inView; }
+
+    setFps(fps) { this.interval = fps > 0 ? 1000 / fps : 0; }
+
+    update() {
+        physics.setRunning(this.active);
+        this.wake();
+    }
+
+    wake() {
+        if (!this.handle && this.active) this.handle = requestAnimationFrame(this.loop);
+    }
+
+    loop(now) {
+        this.handle = 0;
+        if (!this.active) return;
+        // 限帧时留 1ms 容差，避免 60Hz 屏幕上 30fps 抖成 20fps
+        if (this.interval && now - this.last < this.interval - 1) {
+            this.handle = requestAnimationFrame(this.loop);
+            return;
+        }
+        this.last = now;
+        const started = performance.now();
+        const more = this.frame(now);
+        perf.frame(now, performance.now() - started);
+        if (more) this.handle = requestAnimationFrame(this.loop);
+    }
+}
+
+// 返回是否还需要下一帧
+function animate(now) {
+    if (restylePending) {
+        restylePending = false;
+        for (const f of floaters) f.applyRandomStyle();
+        sceneSync.schedule();
+    }
+    // 先读（只有尺寸失效时才读布局），再同步给物理线程，最后统一写位置
+    for (const f of floaters) if (f.sizeDirty) renderer.measure(f);
+    physics.setBounds(canvasW, canvasH);
+    physics.syncSizes(floaters);
+    physics.flush();
+    physics.tick(now);
+    physics.applyPositions(floaters);
+    renderer.render(floaters);
+    return floaters.length > 0 && physics.moving;
+}
+
+const scheduler = new FrameScheduler(animate);
+function wakeAnimation() { scheduler.wake(); }
+
+// === 运行参数 ===
+// ?seed= / ?fps= / ?damping= / ?hud=1 不写进页面 HTML（不然每个取值都是一份新页面、一个新组件目录），
+// 由 Python 作为组件参数随 render 消息下发，改了也不重建 iframe；直接打开页面时从自己的地址上读
+const runOptions = { seed: null, fps: 0, damping: 1, hud: false };
+
+function applyRunOptions(options) {
+    const seed = options.seed == null || options.seed === '' ? null : String(options.seed);
+    // 去掉种子后回到 Math.random；有种子时每次生成前在 spawnWords 里重新播种
+    if (seed === null && runOptions.seed !== null) seedRandom(null);
+    runOptions.seed = seed;
+    const fps = Number(options.fps);
+    runOptions.fps = fps > 0 && fps <= 240 ? fps : 0;
+    scheduler.setFps(runOptions.fps);
+    // 阻尼小于 1 时文字会慢慢停下并休眠，整个场景静止后动画循环也跟着停
+    const damping = Number(options.damping);
+    runOptions.damping = damping >= 0.5 && damping < 1 ? damping : 1;
+    if (runOptions.damping !== physics.damping) physics.setDamping(runOptions.damping);
+    runOptions.hud = options.hud === true || options.hud === '1';
+    setHud(runOptions.hud);
+    wakeAnimation();
+}
+
+// === 场景同步 ===
+// 页面作为 Streamlit 双向组件加载（见 component.py）。场景变化后编码成紧凑的 token（见 scene-format.js）防抖回传给 Python，
+// 存进 session_state 并同步到地址栏的 ?scene=，复制地址就是分享链接。
+// 重跑时 iframe 不重建，只收到一条新的 render 消息；iframe 被重建或从分享链接打开时按 token 恢复，不再重新生成。
+const SCENE_SYNC_DELAY = 1000;
+// 收不到 render 消息（不在组件里，比如直接打开页面）时按默认流程开场
+const FIRST_RENDER_TIMEOUT = 1000;
+// 记住最近发出 / 应用过的 token，render 消息带回来时不再重复恢复
+const KNOWN_SCENES = 16;
+
+// 背景用和 render.py 的 parse_background 相同的写法；上传的图是 blob URL，iframe 重建后就失效了，恢复成 bliss
+function backgroundSpec() {
+    if (background.kind === 'gradient') return `rainbow:${highSatGradients.indexOf(background.spec)}`;
+    if (background.kind === 'image') return background.url === blissData ? 'bliss' : 'upload';
+    return background.color === '#008080' ? 'win98' : 'white';
+}
+
+function restoreBackground(spec) {
+    const rainbow = /^rainbow:(\d+)$/.exec(spec);
+    if (rainbow && highSatGradients[+rainbow[1]]) {
+        // 已经点过一次彩虹，下次再点就随机换
+        rainbowClickCount = Math.max(rainbowClickCount, 1);
+        applyBackground({ kind: 'gradient', spec: highSatGradients[+rainbow[1]] });
+    } else {
+        setBg(spec === 'white' || spec === 'win98' ? spec : 'bliss');
+    }
+}
+
+// 每个文字：[text, x, y, vx, vy, packStyle(style)]
+function snapshotScene() {
+    return {
+        width: Math.round(canvasW),
+        height: Math.round(canvasH),
+        background: backgroundSpec(),
+        floaters: floaters.map(f => [f.text, f.x, f.y, f.vx, f.vy, packStyle(f.style)]),
+    };
+}
+
+// 先等场景里用到的字形（和 spawnWords 一样），再把所有文字建好、样式类和位置写好后一次性挂进 DOM（renderer.batch），
+// 尺寸在下一帧统一读；画布尺寸和保存时不同就按比例换算位置。等字体时又来了新场景，以后来的为准
+let restoreSeq = 0;
+
+async function restoreScene(scene) {
+    const seq = ++restoreSeq;
+    sceneSync.paused = true;
+    await loadFonts(scene.floaters.map(f => f[0]).join(''));
+    if (seq !== restoreSeq) return;
+    const sx = scene.width ? canvasW / scene.width : 1;
+    const sy = scene.height ? canvasH / scene.height : 1;
+    clearCanvas();
+    restoreBackground(scene.background);
+    renderer.batch(() => {
+        for (const [text, x, y, vx, vy, packed] of scene.floaters) {
+            floaters.push(createFloater(text, unpackStyle(packed), x * sx, y * sy, vx, vy));
+        }
+    });
+    sceneSync.paused = false;
+    wakeAnimation();
+}
+
+// Streamlit 组件协议：postMessage 收发 streamlit:* 消息
+class SceneSync {
+    constructor() {
+        this.embedded = window.parent !== window;
+        this.known = new Set();
+        this.started = false;
+        this.paused = false;
+        this.timer = 0;
+        this.height = 0;
+        window.addEventListener('message', (e) => this.receive(e.data));
+    }
+
+    post(type, data) {
+        if (this.embedded) window.parent.postMessage({ isStreamlitMessage: true, type, ...data }, '*');
+    }
+
+    connect() {
+        this.post('streamlit:componentReady', { apiVersion: 1 });
+        // 直接打开页面时分享参数和运行参数都在自己的地址上
+        if (!this.embedded) applyRunOptions(Object.fromEntries(new URLSearchParams(location.search)));
+        const token = this.embedded ? null : new URLSearchParams(location.search).get('scene');
+        setTimeout(() => this.start(token), this.embedded ? FIRST_RENDER_TIMEOUT : 0);
+    }
+
+    remember(token) {
+        this.known.delete(token);
+        this.known.add(token);
+        if (this.known.size > KNOWN_SCENES) this.known.delete(this.known.values().next().value);
+    }
+
+    async start(token) {
+        if (this.started) return;
+        this.started = true;
+        if (await this.restore(token)) return;
+        setBg('bliss');
+        setTimeout(spawnSentence, 500);
+    }
+
+    // 解不开的 token（格式不对、版本不认识）当作没有
+    async restore(token) {
+        if (typeof token !== 'string' || !token || this.known.has(token)) return false;
+        this.remember(token);
+        const scene = await decodeScene(token).catch(() => null);
+        if (!scene) return false;
+        await restoreScene(scene);
+        return true;
+    }
+
+    receive(msg) {
+        if (!msg || msg.type !== 'streamlit:render') return;
+        const args = msg.args || {};
+        // 组件 iframe 的高度由页面上报；页面本身 min-height 跟着视口走，按内容量高度会越报越高，所以用 Python 给的固定值
+        if (args.height && args.height !== this.height) {
+            this.height = args.height;
+            this.post('streamlit:setFrameHeight', { height: args.height });
+        }
+        applyRunOptions(args.options || {});
+        if (!this.started) this.start(args.scene);
+        else this.restore(args.scene);
+    }
+
+    // 连续操作只在停下来 SCENE_SYNC_DELAY 之后回传一次，每次回传都会让 Python 重跑一遍
+    schedule() {
+        if (!this.embedded || this.paused) return;
+        clearTimeout(this.timer);
+        this.timer = setTimeout(async () => {
+            const token = await encodeScene(snapshotScene());
+            this.remember(token);
+            this.post('streamlit:setComponentValue', { value: token, dataType: 'json' });
+        }, SCENE_SYNC_DELAY);
+    }
+}
+
+const sceneSync = new SceneSync();
+
+window.onload = () => { 
+    sceneSync.connect();
+    wakeAnimation(); 
+};
+
+textInput.addEventListener('keypress', (e) => e.key === 'Enter' && spawnSentence());
+
@@ -0,0 +1,58 @@
+// === 物理 Worker 入口 ===
+// 运行时和 spatial-grid.js、physics.js 拼成一个 Blob 启动（见 main.js 的 PhysicsClient）。
+// 主线程按帧批量发指令；这里按固定步长推进，把最新位置以可转移的 Float32Array 发回去。
+// 场景全部静止或主线程要求暂停（页面隐藏、滚出视口）时停表，下一批指令到达再继续。
+const world = new PhysicsWorld();
+const stepper = new FixedStepper();
+const spare = [];
+let seq = 0;
+let running = true;
+let timer = 0;
+
+self.onmessage = (e) => {
+    const msg = e.data;
+    if (msg.type === 'batch') {
+        for (const cmd of msg.commands) world.apply(cmd);
+        seq = msg.seq;
+        start();
+    } else if (msg.type === 'recycle') {
+        spare.push(msg.buffer);
+    } else if (msg.type === 'run') {
+        running = msg.running;
+        running ? start() : stop();
+    }
+};
+
+function start() {
+    if (timer || !running) return;
+    // 停表期间的时间不补步
+    stepper.last = null;
+    timer = setInterval(loop, PHYSICS_STEP_MS / 2);
+}
+
+function stop() {
+    clearInterval(timer);
+    timer = 0;
+}
+
+function loop() {
+    const steps = stepper.advance(performance.now(), () => world.step());
+    if (steps === 0) return;
+    const moving = world.awake > 0;
+    // 静止前的最后一帧也要发出去，主线程靠 seq 确认指令已生效
+    postPositions(moving);
+    if (!moving) stop();
+}
+
+function postPositions(moving) {
+    const length = world.count * 2;
+    let buffer = spare.pop();
+    if (!buffer || buffer.length < length) buffer = new Float32Array(Math.max(length, 64));
+    for (let i = 0; i < world.count; i++) {
+        buffer[i * 2] = world.x[i];
+        buffer[i * 2 + 1] = world.y[i];
+    }
+    self.postMessage({ type: 'positions', seq, count: world.count, moving, buffer }, [buffer.buffer]);
+}
+
+start();
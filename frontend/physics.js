@@ -0,0 +1,139 @@
+// === 物理模拟 ===
+// 位置、速度、尺寸按结构数组（SoA）存在 Float32Array 里，每个漂浮文字占一个槽位。
+// 同一份代码既跑在 Worker 里（见 physics-worker.js），也在 Worker 不可用时跑在主线程。
+const PHYSICS_STEP_MS = 1000 / 60;
+const PHYSICS_MAX_STEPS = 4;
+const SAFE_BUFFER = 30;
+const GRID_MARGIN = 8;
+// 开启阻尼后，速度（每步像素，|vx| + |vy|）低于这个值的文字进入休眠，不再积分，直到被碰到
+const SLEEP_SPEED = 0.02;
+
+class PhysicsWorld {
+    constructor(capacity = 256) {
+        this.capacity = 0;
+        this.count = 0;        // 已用槽位的上界（最大槽位 + 1）
+        this.awake = 0;        // 上一步还在动的文字数，0 表示整个场景静止
+        this.damping = 1;      // 每步速度乘的系数，1 表示不衰减（原来的匀速漂浮）
+        this.width = 0;
+        this.height = 0;
+        this.grid = new SpatialGrid();
+        this.grow(capacity);
+    }
+
+    grow(capacity) {
+        const copy = (Type, old) => { const next = new Type(capacity); if (old) next.set(old); return next; };
+        this.x = copy(Float32Array, this.x);
+        this.y = copy(Float32Array, this.y);
+        this.vx = copy(Float32Array, this.vx);
+        this.vy = copy(Float32Array, this.vy);
+        this.w = copy(Float32Array, this.w);
+        this.h = copy(Float32Array, this.h);
+        this.alive = copy(Uint8Array, this.alive);
+        this.asleep = copy(Uint8Array, this.asleep);
+        this.capacity = capacity;
+    }
+
+    // 主线程发来的指令，Worker 和本地模式共用同一套处理
+    apply(cmd) {
+        if (cmd.type === 'add') {
+            if (cmd.slot >= this.capacity) this.grow(Math.max(this.capacity * 2, cmd.slot + 1));
+            const i = cmd.slot;
+            this.x[i] = cmd.x; this.y[i] = cmd.y;
+            this.vx[i] = cmd.vx; this.vy[i] = cmd.vy;
+            this.w[i] = cmd.w; this.h[i] = cmd.h;
+            this.alive[i] = 1;
+            this.asleep[i] = 0;
+            this.count = Math.max(this.count, i + 1);
+            this.awake++;
+        } else if (cmd.type === 'resize') {
+            this.w[cmd.slot] = cmd.w; this.h[cmd.slot] = cmd.h;
+            this.asleep[cmd.slot] = 0;
+            this.awake++;
+        } else if (cmd.type === 'remove') {
+            this.alive[cmd.slot] = 0;
+            while (this.count > 0 && !this.alive[this.count - 1]) this.count--;
+        } else if (cmd.type === 'clear') {
+            this.alive.fill(0);
+            this.count = 0;
+        } else if (cmd.type === 'bounds') {
+            this.width = cmd.width; this.height = cmd.height;
+            this.asleep.fill(0);
+            this.awake = this.count;
+        } else if (cmd.type === 'damping') {
+            this.damping = cmd.damping;
+        }
+    }
+
+    // 推进一个固定步长；碰撞处理和原来逐个 Floater.update() 的顺序、力度一致
+    step() {
+        const { x, y, vx, vy, w, h, alive, asleep, damping } = this;
+        const maxW = this.width, maxH = this.height;
+        this.grid.rebuild(this);
+        this.awake = 0;
+
+        for (let i = 0; i < this.count; i++) {
+            // 休眠的文字不动，但还在网格里，别人撞上来时会被叫醒
+            if (!alive[i] || asleep[i]) continue;
+            const wi = w[i], hi = h[i];
+            let touched = false;
+            x[i] += vx[i];
+            y[i] += vy[i];
+
+            if (x[i] <= SAFE_BUFFER) { vx[i] = Math.abs(vx[i]); x[i] = SAFE_BUFFER; }
+            else if (x[i] + wi >= maxW - SAFE_BUFFER) { vx[i] = -Math.abs(vx[i]); x[i] = maxW - wi - SAFE_BUFFER; }
+
+            if (y[i] <= SAFE_BUFFER) { vy[i] = Math.abs(vy[i]); y[i] = SAFE_BUFFER; }
+            else if (y[i] + hi >= maxH - SAFE_BUFFER) { vy[i] = -Math.abs(vy[i]); y[i] = maxH - hi - SAFE_BUFFER; }
+
+            // 网格是按本步开始时的位置建的，外扩一点余量兜住本步内已经移动过的邻居
+            for (const j of this.grid.query(this, i, GRID_MARGIN)) {
+                const dx = (x[i] + wi / 2) - (x[j] + w[j] / 2);
+                const dy = (y[i] + hi / 2) - (y[j] + h[j] / 2);
+                const minDistX = (wi + w[j]) / 2;
+                const minDistY = (hi + h[j]) / 2;
+
+                if (Math.abs(dx) < minDistX && Math.abs(dy) < minDistY) {
+                    touched = true;
+                    asleep[j] = 0;
+                    const overlapX = minDistX - Math.abs(dx);
+                    const overlapY = minDistY - Math.abs(dy);
+                    if (overlapX < overlapY) {
+                        const dir = dx > 0 ? 1 : -1;
+                        x[i] += dir * overlapX * 0.05; vx[i] += dir * 0.05;
+                    } else {
+                        const dir = dy > 0 ? 1 : -1;
+                        y[i] += dir * overlapY * 0.05; vy[i] += dir * 0.05;
+                    }
+                }
+            }
+
+            if (damping < 1) {
+                vx[i] *= damping; vy[i] *= damping;
+                if (!touched && Math.abs(vx[i]) + Math.abs(vy[i]) < SLEEP_SPEED) {
+                    asleep[i] = 1; vx[i] = 0; vy[i] = 0;
+                    continue;
+                }
+            }
+            this.awake++;
+        }
+    }
+}
+
+// 固定步长累加器：按真实流逝时间补步，单次最多补 PHYSICS_MAX_STEPS 步，防止卡顿后“追帧”
+class FixedStepper {
+    constructor() { this.last = null; this.acc = 0; }
+
+    advance(now, step) {
+        if (this.last === null) this.last = now;
+        this.acc += now - this.last;
+        this.last = now;
+        let steps = 0;
+        while (this.acc >= PHYSICS_STEP_MS && steps < PHYSICS_MAX_STEPS) {
+            step();
+            this.acc -= PHYSICS_STEP_MS;
+            steps++;
+        }
+        if (steps === PHYSICS_MAX_STEPS) this.acc = 0;
+        return steps;
+    }
+}
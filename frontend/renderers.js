@@ -0,0 +1,239 @@
+// === 渲染器 ===
+// dom：每个词一个 div.floater（默认）
+// canvas：换样式时把每个词预先栅格化成位图，每帧只往一张 <canvas> 上贴图
+const measureContext = createSurface(1, 1).getContext('2d');
+
+function styleFont(style) {
+    return `${style.italic ? 'italic ' : ''}900 ${style.size}px ${style.font}`;
+}
+
+// 按样式描述把文字画成位图，返回盒子尺寸（等价于 DOM 的 offsetWidth/offsetHeight）和外扩边距
+function rasterizeText(text, style, dpr) {
+    const font = styleFont(style);
+    measureContext.font = font;
+    const [padY, padX] = style.padding;
+    const w = measureContext.measureText(text).width + padX * 2;
+    const h = style.size * 1.2 + padY * 2;
+
+    // 阴影、描边、斜体都会画出盒子外面，留足边距
+    let reach = style.stroke ? style.stroke.width : 0;
+    for (const sh of style.shadows) reach = Math.max(reach, Math.abs(sh.x) + sh.blur * 2, Math.abs(sh.y) + sh.blur * 2);
+    if (style.dropShadow) reach = Math.max(reach, Math.abs(style.dropShadow.x), Math.abs(style.dropShadow.y));
+    const bleed = Math.ceil(reach + style.size * (style.italic ? 0.3 : 0.1) + 4);
+
+    const surface = createSurface(Math.ceil((w + bleed * 2) * dpr), Math.ceil((h + bleed * 2) * dpr));
+    const ctx = surface.getContext('2d');
+    ctx.scale(dpr, dpr);
+    ctx.translate(bleed, bleed);
+
+    if (style.background) {
+        ctx.fillStyle = style.background;
+        ctx.fillRect(0, 0, w, h);
+    }
+
+    ctx.font = font;
+    ctx.textBaseline = 'middle';
+    ctx.lineJoin = 'round';
+    const tx = padX, ty = h / 2;
+    const fill = style.gradient ? cssLinearGradient(ctx, style.gradient.angle, style.gradient.colors.map(c => [c]), w, h)
+        : (style.color && style.color !== 'transparent' ? style.color : null);
+
+    const drawGlyphs = (x, y, fillStyle, strokeStyle) => {
+        const doFill = () => { if (fillStyle) { ctx.fillStyle = fillStyle; ctx.fillText(text, x, y); } };
+        const doStroke = () => {
+            if (!style.stroke) return;
+            ctx.lineWidth = style.stroke.width; ctx.strokeStyle = strokeStyle; ctx.strokeText(text, x, y);
+        };
+        if (style.paintOrder === 'stroke fill') { doStroke(); doFill(); } else { doFill(); doStroke(); }
+    };
+
+    // text-shadow：列表里靠前的在上层，所以倒着画；模糊阴影用画到画面外再偏移回来的办法只留影子
+    for (let i = style.shadows.length - 1; i >= 0; i--) {
+        const sh = style.shadows[i];
+        if (sh.blur) {
+            ctx.save();
+            // 阴影参数按设备像素计，不受 ctx.scale 影响
+            ctx.shadowColor = sh.color; ctx.shadowBlur = sh.blur * dpr;
+            ctx.shadowOffsetX = (sh.x + 10000) * dpr; ctx.shadowOffsetY = sh.y * dpr;
+            drawGlyphs(tx - 10000, ty, sh.color, sh.color);
+            ctx.restore();
+        } else {
+            drawGlyphs(tx + sh.x, ty + sh.y, sh.color, sh.color);
+        }
+    }
+
+    if (style.dropShadow) {
+        ctx.shadowColor = style.dropShadow.color;
+        ctx.shadowOffsetX = style.dropShadow.x * dpr; ctx.shadowOffsetY = style.dropShadow.y * dpr;
+    }
+    drawGlyphs(tx, ty, fill, style.stroke ? style.stroke.color : null);
+    return { image: surface, w, h, bleed };
+}
+
+class DomRenderer {
+    constructor(container, options = {}) {
+        this.container = container;
+        // mount 的插入点：平时是容器，批量挂载期间是一个 DocumentFragment
+        this.target = container;
+        // unmount 下来的元素留着给下一个文字用，不重新创建、不重新绑事件
+        this.pool = [];
+        this.crt = Boolean(options.crt);
+        // 样式图集整页只注入一次，之后换样式只改 className
+        const atlas = document.createElement('style');
+        atlas.id = 'style-atlas';
+        atlas.textContent = buildStyleAtlas(this.crt ? crtColor : undefined);
+        document.head.appendChild(atlas);
+        // 文字尺寸由 ResizeObserver 维护，动画循环里不读布局
+        this.resizeObserver = new ResizeObserver((entries) => {
+            for (const entry of entries) {
+                const floater = entry.target.floater;
+                if (!floater) continue;
+                const box = entry.borderBoxSize && entry.borderBoxSize[0];
+                if (box) {
+                    floater.w = box.inlineSize;
+                    floater.h = box.blockSize;
+                    floater.sizeDirty = false;
+                } else {
+                    floater.sizeDirty = true;
+                }
+            }
+            // 尺寸变了要同步给物理，动画循环可能已经停了
+            wakeAnimation();
+        });
+    }
+
+    mount(floater) {
+        const element = this.pool.pop() || this.createElement();
+        element.textContent = floater.text;
+        element.floater = floater;
+        floater.element = element;
+        this.target.appendChild(element);
+        this.resizeObserver.observe(element);
+    }
+
+    createElement() {
+        const element = document.createElement('div');
+        element.className = 'floater';
+        // 元素会轮流给不同的文字用，点击时按 element.floater 找当前的主人
+        element.addEventListener('click', (e) => {
+            e.stopPropagation();
+            if (element.floater) removeFloater(element.floater);
+        });
+        return element;
+    }
+
+    // build 里 mount 的元素先攒进 DocumentFragment，结束后一次插入
+    batch(build) {
+        const fragment = document.createDocumentFragment();
+        this.target = fragment;
+        try { build(); } finally { this.target = this.container; }
+        this.container.appendChild(fragment);
+    }
+
+    unmount(floater) {
+        const element = floater.element;
+        this.resizeObserver.unobserve(element);
+        element.remove();
+        element.floater = null;
+        floater.element = null;
+        if (this.pool.length < POOL_SIZE) this.pool.push(element);
+    }
+
+    paintStyle(style) { return this.crt ? crtStyle(style) : style; }
+
+    applyStyle(floater) {
+        // 图集里的颜色已经按 CRT 模式换算过，这里直接用原样式选类
+        floater.element.className = styleClassName(floater.style);
+        floater.transformCSS = styleTransformCSS(floater.style);
+        floater.sizeDirty = true;
+        this.place(floater);
+    }
+
+    // 只在尺寸缓存失效时调用，而且由 animate() 在所有写操作之前统一调用
+    measure(floater) {
+        floater.w = floater.element.offsetWidth;
+        floater.h = floater.element.offsetHeight;
+        floater.sizeDirty = false;
+    }
+
+    // 位置走 transform，只触发合成，不触发布局；样式里的缩放/倾斜/旋转接在平移后面
+    place(floater) {
+        floater.element.style.transform = `translate3d(${floater.x}px, ${floater.y}px, 0)${floater.transformCSS}`;
+    }
+
+    render(list) {
+        for (const f of list) this.place(f);
+    }
+}
+
+class CanvasRenderer {
+    constructor(container, options = {}) {
+        this.crt = Boolean(options.crt);
+        this.stage = document.createElement('canvas');
+        this.stage.className = 'floater-stage';
+        container.appendChild(this.stage);
+        this.ctx = this.stage.getContext('2d');
+        this.dpr = window.devicePixelRatio || 1;
+        // 点击删除：在 JS 里做命中测试
+        this.stage.addEventListener('click', (e) => {
+            const hit = this.hitTest(floaters, e.offsetX, e.offsetY);
+            if (hit) removeFloater(hit);
+        });
+    }
+
+    mount(floater) { floater.bitmap = null; }
+
+    batch(build) { build(); }
+
+    unmount(floater) { floater.bitmap = null; }
+
+    paintStyle(style) { return this.crt ? crtStyle(style) : style; }
+
+    applyStyle(floater) {
+        const raster = rasterizeText(floater.text, this.paintStyle(floater.style), this.dpr);
+        floater.bitmap = raster.image;
+        floater.bleed = raster.bleed;
+        floater.w = raster.w;
+        floater.h = raster.h;
+        floater.sizeDirty = false;
+    }
+
+    measure(floater) { floater.sizeDirty = false; }
+
+    resize() {
+        const width = Math.round(canvasW * this.dpr), height = Math.round(canvasH * this.dpr);
+        if (this.stage.width !== width || this.stage.height !== height) {
+            this.stage.width = width;
+            this.stage.height = height;
+        }
+    }
+
+    render(list) {
+        this.resize();
+        const ctx = this.ctx;
+        ctx.setTransform(1, 0, 0, 1, 0, 0);
+        ctx.clearRect(0, 0, this.stage.width, this.stage.height);
+        ctx.setTransform(this.dpr, 0, 0, this.dpr, 0, 0);
+        for (const f of list) drawFloater(ctx, f.bitmap, f.x + f.w / 2, f.y + f.h / 2, f.w, f.h, f.bleed, f.style);
+    }
+
+    // 把点击点逆变换回文字自身坐标系，再判断是否落在盒子里；后画的在上面，倒序查找
+    hitTest(list, x, y) {
+        for (let i = list.length - 1; i >= 0; i--) {
+            const f = list[i], s = f.style;
+            let px = (x - f.x - f.w / 2) / s.scaleX;
+            let py = (y - f.y - f.h / 2) / s.scaleY;
+            if (s.skew) px -= Math.tan(s.skew * Math.PI / 180) * py;
+            const rad = -s.rotate * Math.PI / 180;
+            const lx = px * Math.cos(rad) - py * Math.sin(rad);
+            const ly = px * Math.sin(rad) + py * Math.cos(rad);
+            if (Math.abs(lx) <= f.w / 2 && Math.abs(ly) <= f.h / 2) return f;
+        }
+        return null;
+    }
+}
+
+// options.crt：CRT 预烘焙模式下文字用换算过颜色的样式
+function createRenderer(mode, container, options = {}) {
+    return mode === 'canvas' ? new CanvasRenderer(container, options) : new DomRenderer(container, options);
+}
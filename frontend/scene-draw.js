@@ -0,0 +1,167 @@
+// === 场景绘制 ===
+// 背景、扫描线、文字位图的 Canvas 绘制函数。
+// 页面（canvas 渲染模式、导出兜底）和导出 Worker（见 export-worker.js）共用这一份。
+
+function createSurface(width, height) {
+    if (typeof OffscreenCanvas !== 'undefined') return new OffscreenCanvas(width, height);
+    const surface = document.createElement('canvas');
+    surface.width = width; surface.height = height;
+    return surface;
+}
+
+// CSS 渐变角度：0deg 朝上、顺时针；渐变线长度刚好覆盖整个盒子。
+// stops 是 [颜色, 位置(0~1，可省略)]，省略位置时和 CSS 一样均匀分布
+function cssLinearGradient(ctx, angle, stops, w, h) {
+    const rad = angle * Math.PI / 180;
+    const dx = Math.sin(rad), dy = -Math.cos(rad);
+    const half = (Math.abs(w * dx) + Math.abs(h * dy)) / 2;
+    const gradient = ctx.createLinearGradient(w / 2 - dx * half, h / 2 - dy * half, w / 2 + dx * half, h / 2 + dy * half);
+    addColorStops(gradient, stops);
+    return gradient;
+}
+
+function addColorStops(gradient, stops) {
+    stops.forEach(([color, offset], i) => {
+        gradient.addColorStop(offset == null ? i / (stops.length - 1) : offset, color);
+    });
+}
+
+// "to bottom right" 这类角落写法：渐变线垂直于另一条对角线，角度随宽高比变化
+function cornerAngle(corner, w, h) {
+    const toRight = corner.includes('right') ? 1 : -1;
+    const toBottom = corner.includes('bottom') ? 1 : -1;
+    return Math.atan2(toRight * h, -toBottom * w) * 180 / Math.PI;
+}
+
+function gradientCSS(spec) {
+    const stops = spec.stops.map(([color, offset]) => offset == null ? color : `${color} ${offset * 100}%`).join(', ');
+    if (spec.type === 'radial') return `radial-gradient(circle, ${stops})`;
+    return `linear-gradient(${spec.corner ? `to ${spec.corner}` : `${spec.angle}deg`}, ${stops})`;
+}
+
+function backgroundGradient(ctx, spec, w, h) {
+    if (spec.type === 'radial') {
+        // circle 默认 farthest-corner：半径是中心到角落的距离
+        const gradient = ctx.createRadialGradient(w / 2, h / 2, 0, w / 2, h / 2, Math.hypot(w, h) / 2);
+        addColorStops(gradient, spec.stops);
+        return gradient;
+    }
+    const angle = spec.corner ? cornerAngle(spec.corner, w, h) : spec.angle;
+    return cssLinearGradient(ctx, angle, spec.stops, w, h);
+}
+
+// 等价于 CSS 的 center/cover no-repeat
+function drawCover(ctx, image, w, h) {
+    const scale = Math.max(w / image.width, h / image.height);
+    const dw = image.width * scale, dh = image.height * scale;
+    ctx.drawImage(image, (w - dw) / 2, (h - dh) / 2, dw, dh);
+}
+
+// 上传的背景图：按 cover 裁剪缩放到画布的物理像素尺寸（不放大），重新编码成 WebP，不支持时 JPEG
+const UPLOAD_TYPES = ['image/webp', 'image/jpeg'];
+const UPLOAD_QUALITY = 0.85;
+
+async function transcodeImage(blob, width, height) {
+    const image = await createImageBitmap(blob);
+    try {
+        const shrink = Math.min(1, 1 / Math.max(width / image.width, height / image.height));
+        const surface = createSurface(Math.max(1, Math.round(width * shrink)), Math.max(1, Math.round(height * shrink)));
+        const ctx = surface.getContext('2d');
+        ctx.imageSmoothingQuality = 'high';
+        drawCover(ctx, image, surface.width, surface.height);
+        let encoded = null;
+        for (const type of UPLOAD_TYPES) {
+            encoded = surface.convertToBlob
+                ? await surface.convertToBlob({ type, quality: UPLOAD_QUALITY })
+                : await new Promise(resolve => surface.toBlob(resolve, type, UPLOAD_QUALITY));
+            // 不支持的格式会悄悄退回 PNG
+            if (encoded && encoded.type === type) break;
+        }
+        return encoded;
+    } finally {
+        image.close();
+    }
+}
+
+// 背景描述：{ kind: 'color', color } / { kind: 'gradient', spec } / { kind: 'image', image }
+function drawBackground(ctx, background, w, h) {
+    if (background.kind === 'gradient') {
+        ctx.fillStyle = backgroundGradient(ctx, background.spec, w, h);
+        ctx.fillRect(0, 0, w, h);
+    } else if (background.kind === 'image' && background.image) {
+        ctx.fillStyle = '#ffffff';
+        ctx.fillRect(0, 0, w, h);
+        drawCover(ctx, background.image, w, h);
+    } else {
+        ctx.fillStyle = background.color || '#ffffff';
+        ctx.fillRect(0, 0, w, h);
+    }
+}
+
+// 和 #meme-canvas::after 同一个 4x4 斜纹图块：#aaa 像素落在 x + y ≡ 3 (mod 4) 的位置
+let scanlineTileCache = null;
+function scanlineTile() {
+    if (scanlineTileCache) return scanlineTileCache;
+    const tile = createSurface(4, 4);
+    const ctx = tile.getContext('2d');
+    ctx.fillStyle = '#aaaaaa';
+    for (let y = 0; y < 4; y++) ctx.fillRect(3 - y, y, 1, 1);
+    return (scanlineTileCache = tile);
+}
+
+function drawScanlines(ctx, w, h) {
+    ctx.save();
+    ctx.globalAlpha = 0.25;
+    ctx.globalCompositeOperation = 'overlay';
+    ctx.imageSmoothingEnabled = false;
+    ctx.fillStyle = ctx.createPattern(scanlineTile(), 'repeat');
+    ctx.fillRect(0, 0, w, h);
+    ctx.restore();
+}
+
+// === CRT 预烘焙 ===
+// 和 #meme-canvas 的 filter: contrast(125%) brightness(105%) 逐通道等价（每一步都截断到 0~1）
+const CRT_CONTRAST = 1.25;
+const CRT_BRIGHTNESS = 1.05;
+
+function crtChannel(v) {
+    const c = Math.max(0, Math.min(1, (v / 255 - 0.5) * CRT_CONTRAST + 0.5));
+    return Math.round(Math.min(1, c * CRT_BRIGHTNESS) * 255);
+}
+
+// 对已画好的像素整体换算一次，查表
+let crtTable = null;
+function bakeCRT(ctx, width, height) {
+    if (!crtTable) {
+        crtTable = new Uint8ClampedArray(256);
+        for (let v = 0; v < 256; v++) crtTable[v] = crtChannel(v);
+    }
+    const pixels = ctx.getImageData(0, 0, width, height);
+    const data = pixels.data;
+    for (let i = 0; i < data.length; i += 4) {
+        data[i] = crtTable[data[i]];
+        data[i + 1] = crtTable[data[i + 1]];
+        data[i + 2] = crtTable[data[i + 2]];
+    }
+    ctx.putImageData(pixels, 0, 0);
+}
+
+// 文字位图按中心点贴上去，变换顺序和 DOM 的 scale → skew → rotate 一致
+function drawFloater(ctx, image, cx, cy, w, h, bleed, t) {
+    ctx.save();
+    ctx.translate(cx, cy);
+    ctx.scale(t.scaleX, t.scaleY);
+    if (t.skew) ctx.transform(1, 0, Math.tan(t.skew * Math.PI / 180), 1, 0, 0);
+    ctx.rotate(t.rotate * Math.PI / 180);
+    ctx.drawImage(image, -w / 2 - bleed, -h / 2 - bleed, w + bleed * 2, h + bleed * 2);
+    ctx.restore();
+}
+
+// 导出任务：{ width, height, scale, background, items: [{ image, cx, cy, w, h, bleed, scaleX, scaleY, skew, rotate }] }
+function drawScene(ctx, job) {
+    ctx.setTransform(job.scale, 0, 0, job.scale, 0, 0);
+    drawBackground(ctx, job.background, job.width, job.height);
+    // 预烘焙的背景里已经带了扫描线
+    if (!job.background.baked) drawScanlines(ctx, job.width, job.height);
+    for (const item of job.items) drawFloater(ctx, item.image, item.cx, item.cy, item.w, item.h, item.bleed, item);
+}
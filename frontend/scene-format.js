@@ -0,0 +1,113 @@
+// === 场景编码 ===
+// 分享链接（?scene=）和 Streamlit 场景同步共用的紧凑二进制格式，base64url 编码。
+// Python 端的实现在 scene.py，格式改动两边一起改。
+//
+// 第 1 字节：格式版本，最高位表示后面的内容经过 deflate-raw 压缩。之后（小端）：
+//   u8 背景（SCENE_BACKGROUNDS 下标）[+ u8 彩虹渐变序号] | u16 宽 | u16 高 | u16 文字数
+//   每个文字：varint 字节数 + UTF-8 文本 | i16 x | i16 y | i8 vx×500 | i8 vy×500
+//             u8 类型（最高位是 1px 描边）| u8 字体 | u8 字号 | u8 上下内边距 | u8 左右内边距 | u8×3 色相
+//             u8 渐变角度档位 | u8 scaleX×50 | u8 scaleY×50 | i8 skew×4 | i8 rotate×4
+// 场景对象和 snapshotScene 一致：{ width, height, background, floaters: [[text, x, y, vx, vy, packStyle(style)]] }
+const SCENE_FORMAT = 1;
+const SCENE_COMPRESSED = 0x80;
+const SCENE_BACKGROUNDS = ['white', 'win98', 'bliss', 'rainbow'];
+
+const clampInt = (value, low, high) => Math.max(low, Math.min(high, Math.round(value)));
+
+function packScene(scene) {
+    const bytes = [];
+    const u8 = (v) => bytes.push(clampInt(v, 0, 255));
+    const i8 = (v) => bytes.push(clampInt(v, -128, 127) & 0xff);
+    const u16 = (v) => { v = clampInt(v, 0, 65535); bytes.push(v & 0xff, v >> 8); };
+    const i16 = (v) => { v = clampInt(v, -32768, 32767) & 0xffff; bytes.push(v & 0xff, v >> 8); };
+    const varint = (v) => { while (v > 0x7f) { bytes.push((v & 0x7f) | 0x80); v >>>= 7; } bytes.push(v); };
+
+    const [name, index] = String(scene.background).split(':');
+    const bg = SCENE_BACKGROUNDS.indexOf(name);
+    // 上传的图分享不出去，按 bliss 记
+    u8(bg === -1 ? SCENE_BACKGROUNDS.indexOf('bliss') : bg);
+    if (name === 'rainbow') u8(+index || 0);
+    u16(scene.width); u16(scene.height);
+    u16(scene.floaters.length);
+    const encoder = new TextEncoder();
+    for (const [text, x, y, vx, vy, style] of scene.floaters) {
+        const utf8 = encoder.encode(text);
+        varint(utf8.length);
+        for (const b of utf8) bytes.push(b);
+        i16(x); i16(y); i8(vx * 500); i8(vy * 500);
+        const [type, font, size, padY, padX, c1, c2, c3, angle, scaleX, scaleY, skew, rotate, outline] = style;
+        u8(type | (outline ? 0x80 : 0));
+        [font, size, padY, padX, c1, c2, c3, angle].forEach(u8);
+        u8(scaleX * 50); u8(scaleY * 50); i8(skew * 4); i8(rotate * 4);
+    }
+    return Uint8Array.from(bytes);
+}
+
+function unpackScene(bytes) {
+    const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    let offset = 0;
+    const need = (n) => { if (offset + n > bytes.length) throw new Error('truncated scene'); };
+    const u8 = () => { need(1); return view.getUint8(offset++); };
+    const i8 = () => { need(1); return view.getInt8(offset++); };
+    const u16 = () => { need(2); offset += 2; return view.getUint16(offset - 2, true); };
+    const i16 = () => { need(2); offset += 2; return view.getInt16(offset - 2, true); };
+    const varint = () => {
+        let value = 0;
+        for (let shift = 0; shift < 28; shift += 7) {
+            const b = u8();
+            value |= (b & 0x7f) << shift;
+            if (!(b & 0x80)) return value;
+        }
+        throw new Error('bad varint');
+    };
+
+    const name = SCENE_BACKGROUNDS[u8()];
+    if (!name) throw new Error('bad background');
+    const background = name === 'rainbow' ? `rainbow:${u8()}` : name;
+    const width = u16(), height = u16();
+    const count = u16();
+    const decoder = new TextDecoder();
+    const floaters = [];
+    for (let i = 0; i < count; i++) {
+        const length = varint();
+        need(length);
+        const text = decoder.decode(bytes.subarray(offset, offset + length));
+        offset += length;
+        const x = i16(), y = i16(), vx = i8() / 500, vy = i8() / 500;
+        const type = u8();
+        const fields = Array.from({ length: 8 }, u8);
+        const scaleX = u8() / 50, scaleY = u8() / 50, skew = i8() / 4, rotate = i8() / 4;
+        floaters.push([text, x, y, vx, vy, [type & 0x7f, ...fields, scaleX, scaleY, skew, rotate, type >> 7]]);
+    }
+    return { width, height, background, floaters };
+}
+
+function toBase64Url(bytes) {
+    let binary = '';
+    for (const b of bytes) binary += String.fromCharCode(b);
+    return btoa(binary).replace(/\+/g, '-').replace(/\//g, '_').replace(/=+$/, '');
+}
+
+function fromBase64Url(text) {
+    const binary = atob(text.replace(/-/g, '+').replace(/_/g, '/'));
+    return Uint8Array.from(binary, c => c.charCodeAt(0));
+}
+
+async function pipeBytes(bytes, stream) {
+    return new Uint8Array(await new Response(new Blob([bytes]).stream().pipeThrough(stream)).arrayBuffer());
+}
+
+// 没有 CompressionStream 的浏览器直接存未压缩的内容，解码两种都认
+async function encodeScene(scene) {
+    const body = packScene(scene);
+    if (typeof CompressionStream === 'undefined') return toBase64Url(Uint8Array.of(SCENE_FORMAT, ...body));
+    const deflated = await pipeBytes(body, new CompressionStream('deflate-raw'));
+    return toBase64Url(Uint8Array.of(SCENE_FORMAT | SCENE_COMPRESSED, ...deflated));
+}
+
+async function decodeScene(token) {
+    const bytes = fromBase64Url(token);
+    if ((bytes[0] & ~SCENE_COMPRESSED) !== SCENE_FORMAT) throw new Error(`unknown scene format ${bytes[0]}`);
+    const body = bytes.subarray(1);
+    return unpackScene(bytes[0] & SCENE_COMPRESSED ? await pipeBytes(body, new DecompressionStream('deflate-raw')) : body);
+}
@@ -0,0 +1,71 @@
+// === 空间哈希网格：碰撞检测的粗筛阶段 ===
+// 每帧按当前位置重建一次，物体按包围盒登记到覆盖到的所有格子里，
+// 查询时只看相邻格子，O(n²) 的两两比较变成近似 O(n)。
+// 物体用槽位下标表示，位置和尺寸直接读 PhysicsWorld 的结构数组（见 physics.js）。
+class SpatialGrid {
+    constructor(minCell = 32, maxCell = 512) {
+        this.minCell = minCell;
+        this.maxCell = maxCell;
+        this.cellSize = minCell;
+        this.cells = new Map();
+        this.usedKeys = [];
+        this.found = [];
+        this.stamps = new Uint32Array(0);
+        this.stamp = 0;
+    }
+
+    // 格子坐标打包成一个整数键，避免每帧拼字符串
+    key(cx, cy) { return (cx + 1024) * 2048 + (cy + 1024); }
+
+    rebuild(world) {
+        for (const key of this.usedKeys) this.cells.get(key).length = 0;
+        this.usedKeys.length = 0;
+        if (this.stamps.length < world.capacity) this.stamps = new Uint32Array(world.capacity);
+        const { x, y, w, h, alive, count } = world;
+
+        // 格子边长取平均尺寸，大多数物体只落在 1~4 个格子里
+        let total = 0, n = 0;
+        for (let i = 0; i < count; i++) if (alive[i]) { total += Math.max(w[i], h[i]); n++; }
+        if (n === 0) return;
+        this.cellSize = Math.min(this.maxCell, Math.max(this.minCell, total / n));
+
+        for (let i = 0; i < count; i++) {
+            if (!alive[i]) continue;
+            const x0 = Math.floor(x[i] / this.cellSize), x1 = Math.floor((x[i] + w[i]) / this.cellSize);
+            const y0 = Math.floor(y[i] / this.cellSize), y1 = Math.floor((y[i] + h[i]) / this.cellSize);
+            for (let cx = x0; cx <= x1; cx++) {
+                for (let cy = y0; cy <= y1; cy++) {
+                    const key = this.key(cx, cy);
+                    let cell = this.cells.get(key);
+                    if (!cell) { cell = []; this.cells.set(key, cell); }
+                    if (cell.length === 0) this.usedKeys.push(key);
+                    cell.push(i);
+                }
+            }
+        }
+    }
+
+    // 返回与槽位 i 的包围盒（外扩 margin）落在相同格子里的其他槽位，已去重；
+    // 返回的数组会被下一次查询复用
+    query(world, i, margin = 0) {
+        const found = this.found;
+        found.length = 0;
+        const stamps = this.stamps;
+        const stamp = ++this.stamp;
+        const { x, y, w, h } = world;
+        const x0 = Math.floor((x[i] - margin) / this.cellSize), x1 = Math.floor((x[i] + w[i] + margin) / this.cellSize);
+        const y0 = Math.floor((y[i] - margin) / this.cellSize), y1 = Math.floor((y[i] + h[i] + margin) / this.cellSize);
+        for (let cx = x0; cx <= x1; cx++) {
+            for (let cy = y0; cy <= y1; cy++) {
+                const cell = this.cells.get(this.key(cx, cy));
+                if (!cell) continue;
+                for (const j of cell) {
+                    if (j === i || stamps[j] === stamp) continue;
+                    stamps[j] = stamp;
+                    found.push(j);
+                }
+            }
+        }
+        return found;
+    }
+}
@@ -0,0 +1,262 @@
+// === 文字样式 ===
+// 随机样式先生成一份纯数据描述，再由渲染器各自落地（DOM 内联样式 / Canvas 位图）
+const fontFamilies = ['"Comic Sans MS"', 'Impact', '"Times New Roman"', 'Arial Black', 'Papyrus', 'Courier New', 'Verdana', '"Brush Script MT"'];
+
+// === 随机数 ===
+// 默认用 Math.random；给了种子时换成 mulberry32，同一种子 + 同一段文字得到同一个场景（render.py 里有同样的实现）
+function hashSeed(seed) {
+    // FNV-1a，按 UTF-16 码元
+    const text = String(seed);
+    let h = 0x811c9dc5;
+    for (let i = 0; i < text.length; i++) h = Math.imul(h ^ text.charCodeAt(i), 0x01000193);
+    return h >>> 0;
+}
+
+function mulberry32(a) {
+    return function () {
+        a = (a + 0x6D2B79F5) | 0;
+        let t = Math.imul(a ^ (a >>> 15), a | 1);
+        t = (t + Math.imul(t ^ (t >>> 7), t | 61)) ^ t;
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+}
+
+let random = Math.random;
+function seedRandom(seed) {
+    random = seed == null || seed === '' ? Math.random : mulberry32(hashSeed(seed));
+}
+
+// 颜色、渐变角度都取有限档位，样式图集（见下方 buildStyleAtlas）才能把所有组合预先生成出来
+const HUE_STEPS = 24;
+const GRADIENT_ANGLES = 24;
+
+function randomHue() { return Math.floor(random() * HUE_STEPS); }
+function hueColor(hue) { return `hsl(${hue * (360 / HUE_STEPS)}, 100%, 50%)`; }
+
+// 画布相对 700px 基准宽度的缩放系数
+function canvasScale(width) { return Math.max(0.4, Math.min(1, width / 700)); }
+
+// 随机部分只抽这几个参数（顺序和 render.py 的 random_style 一致，改动时两边一起改），其余由 buildStyle 按类型展开
+function createRandomStyle(scale) {
+    const baseMin = 30;
+    const baseMax = 120;
+    const type = Math.floor(random() * 10);
+    const params = {
+        type,
+        font: Math.floor(random() * fontFamilies.length),   // ATLAS_FONTS 下标
+        size: Math.floor(random() * (baseMax * scale)) + Math.round(baseMin * scale),
+        padding: [Math.round(25 * scale), Math.round(25 * scale)],
+        palette: [randomHue(), randomHue(), randomHue()],  // color1~3 的色相档位，图集按它选类
+        angle: 0,               // 渐变角度档位
+        scaleX: 1, scaleY: 1, skew: 0, rotate: null,
+        outline: false,         // 类型 4、5 的 1px 描边
+    };
+
+    if (type === 1) {
+        params.angle = Math.floor(random() * GRADIENT_ANGLES);
+        params.skew = random() * 30 - 15;
+    }
+    else if (type === 3) {
+        params.font = fontFamilies.length;  // '"Courier New", monospace'
+    }
+    else if (type === 4) {
+        params.scaleX = 0.6 + random() * 1.2;
+        params.scaleY = 0.6 + random() * 0.8;
+        params.skew = random() * 40 - 20;
+        params.outline = random() > 0.5;
+    }
+    else if (type === 5) {
+        if (random() > 0.5) {
+            params.scaleX = 1.5 + random() * 1.5; params.scaleY = 0.6 + random() * 0.2;
+        } else {
+            params.scaleX = 0.4 + random() * 0.3; params.scaleY = 1.5 + random() * 1.5;
+        }
+        params.scaleX = +params.scaleX.toFixed(2); params.scaleY = +params.scaleY.toFixed(2);
+        params.outline = random() > 0.5;
+    }
+    else if (type === 8) {
+        params.padding = [Math.round(10 * scale), Math.round(20 * scale)];
+        params.rotate = random() * 10 - 5;
+    }
+
+    if (params.rotate === null) params.rotate = Math.floor(random() * 60) - 30;
+    return buildStyle(params);
+}
+
+function buildStyle(params) {
+    const style = {
+        type: params.type,
+        font: ATLAS_FONTS[params.font],
+        size: params.size,
+        padding: params.padding,
+        color: null,
+        stroke: null,           // { width, color }
+        paintOrder: null,
+        shadows: [],            // [{ x, y, blur, color }]，和 CSS 一样第一个在最上层
+        gradient: null,         // { angle, colors }
+        background: null,
+        italic: false,
+        dropShadow: null,       // { x, y, color }
+        scaleX: params.scaleX, scaleY: params.scaleY, skew: params.skew, rotate: params.rotate,
+        palette: params.palette,
+    };
+
+    const [color1, color2, color3] = style.palette.map(hueColor);
+
+    if (style.type === 0) {
+        style.color = "#fff";
+        style.stroke = { width: 2, color: "black" };
+        style.shadows = [{ x: 4, y: 4, blur: 0, color: color1 }, { x: 8, y: 8, blur: 0, color: color2 }];
+    }
+    else if (style.type === 1) {
+        style.gradient = { angle: params.angle * (360 / GRADIENT_ANGLES), colors: [color1, color2, color3] };
+    }
+    else if (style.type === 2) {
+        style.color = color1;
+        style.stroke = { width: 4, color: "black" };
+        style.paintOrder = "stroke fill";
+    }
+    else if (style.type === 3) {
+        style.color = "#00ff00";
+        style.shadows = [{ x: -3, y: 0, blur: 0, color: "red" }, { x: 3, y: 0, blur: 0, color: "blue" }];
+    }
+    else if (style.type === 4 || style.type === 5) {
+        style.color = color1;
+        if (params.outline) style.stroke = { width: 1, color: "black" };
+    }
+    else if (style.type === 6) {
+        style.color = "white";
+        style.shadows = [5, 10, 20].map(blur => ({ x: 0, y: 0, blur, color: color1 }));
+    }
+    else if (style.type === 7) {
+        style.color = "rgba(255,255,255,0.8)";
+        style.shadows = [{ x: 5, y: 5, blur: 0, color: color1 }, { x: 10, y: 10, blur: 0, color: "rgba(0,0,0,0.2)" }];
+        style.italic = true;
+    }
+    else if (style.type === 8) {
+        style.color = "black";
+        style.background = color1;
+    }
+    else {
+        style.color = "transparent";
+        style.stroke = { width: 2, color: color1 };
+        style.dropShadow = { x: 3, y: 3, color: color2 };
+    }
+    return style;
+}
+
+// 场景同步用的紧凑形式：[type, font, size, padY, padX, c1, c2, c3, angle, scaleX, scaleY, skew, rotate, outline]
+function packStyle(style) {
+    return [
+        style.type, ATLAS_FONTS.indexOf(style.font), style.size, style.padding[0], style.padding[1], ...style.palette,
+        style.gradient ? Math.round(style.gradient.angle / (360 / GRADIENT_ANGLES)) : 0,
+        +style.scaleX.toFixed(2), +style.scaleY.toFixed(2), +style.skew.toFixed(1), +style.rotate.toFixed(1),
+        style.stroke && style.stroke.width === 1 ? 1 : 0,
+    ];
+}
+
+function unpackStyle(packed) {
+    const [type, font, size, padY, padX, c1, c2, c3, angle, scaleX, scaleY, skew, rotate, outline] = packed;
+    return buildStyle({
+        type, font, size, padding: [padY, padX], palette: [c1, c2, c3], angle,
+        scaleX, scaleY, skew, rotate, outline: Boolean(outline),
+    });
+}
+
+// 变换顺序固定为 scale → skew → rotate，DOM 和 Canvas 两边保持一致
+function styleTransformCSS(style) {
+    let css = "";
+    if (style.scaleX !== 1 || style.scaleY !== 1) css += ` scale(${style.scaleX}, ${style.scaleY})`;
+    if (style.skew) css += ` skew(${style.skew}deg)`;
+    css += ` rotate(${style.rotate}deg)`;
+    return css;
+}
+
+// === 样式图集 ===
+// 字体、字号、内边距、色相、渐变角度都是有限取值，所有能用到的 CSS 类启动时生成一份（DOM 渲染器注入一次）。
+// 换样式只替换 className，再加一个 transform；颜色通过 --c1~--c3 变量传给各类型的规则。
+const ATLAS_FONTS = fontFamilies.concat(['"Courier New", monospace']);
+const ATLAS_SIZES = [12, 150];      // canvasScale 下限 0.4 × 30 到 30 + 120
+const ATLAS_PADDINGS = [4, 25];     // 类型 8 的 10 × 0.4 到默认的 25
+
+// paint 用来换算颜色（CRT 预烘焙模式传 crtColor）
+function buildStyleAtlas(paint = (c) => c) {
+    const rules = [];
+    const range = ([from, to], rule) => { for (let n = from; n <= to; n++) rules.push(rule(n)); };
+    ATLAS_FONTS.forEach((font, i) => rules.push(`.f-${i}{font-family:${font}}`));
+    range(ATLAS_SIZES, n => `.s-${n}{font-size:${n}px}`);
+    range(ATLAS_PADDINGS, n => `.py-${n}{padding-top:${n}px;padding-bottom:${n}px}`);
+    range(ATLAS_PADDINGS, n => `.px-${n}{padding-left:${n}px;padding-right:${n}px}`);
+    for (let h = 0; h < HUE_STEPS; h++) {
+        for (const slot of [1, 2, 3]) rules.push(`.c${slot}-${h}{--c${slot}:${paint(hueColor(h))}}`);
+    }
+    for (let a = 0; a < GRADIENT_ANGLES; a++) rules.push(`.a-${a}{--angle:${a * (360 / GRADIENT_ANGLES)}deg}`);
+    // 和 createRandomStyle 的十种类型一一对应
+    rules.push(
+        `.t-0{color:${paint('#fff')};-webkit-text-stroke:2px ${paint('black')};text-shadow:4px 4px 0 var(--c1),8px 8px 0 var(--c2)}`,
+        `.t-1{background-image:linear-gradient(var(--angle),var(--c1),var(--c2),var(--c3));-webkit-background-clip:text;background-clip:text;-webkit-text-fill-color:transparent}`,
+        `.t-2{color:var(--c1);-webkit-text-stroke:4px ${paint('black')};paint-order:stroke fill}`,
+        `.t-3{color:${paint('#00ff00')};text-shadow:-3px 0 0 ${paint('red')},3px 0 0 ${paint('blue')}}`,
+        `.t-4,.t-5{color:var(--c1)}`,
+        `.k-1{-webkit-text-stroke:1px ${paint('black')}}`,
+        `.t-6{color:${paint('white')};text-shadow:0 0 5px var(--c1),0 0 10px var(--c1),0 0 20px var(--c1)}`,
+        `.t-7{color:${paint('rgba(255,255,255,0.8)')};text-shadow:5px 5px 0 var(--c1),10px 10px 0 ${paint('rgba(0,0,0,0.2)')};font-style:italic}`,
+        `.t-8{color:${paint('black')};background-color:var(--c1)}`,
+        `.t-9{color:transparent;-webkit-text-stroke:2px var(--c1);filter:drop-shadow(3px 3px 0 var(--c2))}`,
+    );
+    return rules.join('\n');
+}
+
+function styleClassName(style) {
+    const [c1, c2, c3] = style.palette;
+    let name = `floater t-${style.type} f-${ATLAS_FONTS.indexOf(style.font)} s-${style.size}`
+        + ` py-${style.padding[0]} px-${style.padding[1]} c1-${c1} c2-${c2} c3-${c3}`;
+    if (style.gradient) name += ` a-${style.gradient.angle / (360 / GRADIENT_ANGLES)}`;
+    if (style.stroke && style.stroke.width === 1) name += ' k-1';
+    return name;
+}
+
+// === CRT 预烘焙 ===
+// 背景整张烘焙一次（见 scene-draw.js 的 bakeCRT）；文字只需要把样式里的颜色按 crtChannel 换算一遍，动画时没有滤镜开销。
+
+// 借 canvas 把任意 CSS 颜色（名字、hsl、hex）规范化成 #rrggbb 或 rgba()
+let colorContext = null;
+const crtColors = new Map();
+
+function crtColor(color) {
+    if (!color || color === 'transparent') return color;
+    let mapped = crtColors.get(color);
+    if (mapped) return mapped;
+    colorContext = colorContext || createSurface(1, 1).getContext('2d');
+    colorContext.fillStyle = '#000000';
+    colorContext.fillStyle = color;
+    const normalized = String(colorContext.fillStyle);
+    let rgba = null;
+    if (/^#[0-9a-f]{6}$/i.test(normalized)) {
+        rgba = [1, 3, 5].map(i => parseInt(normalized.slice(i, i + 2), 16)).concat(1);
+    } else {
+        const m = normalized.match(/^rgba?\(([^)]+)\)$/);
+        if (m) rgba = m[1].split(',').map(Number);
+    }
+    mapped = rgba ? `rgba(${crtChannel(rgba[0])}, ${crtChannel(rgba[1])}, ${crtChannel(rgba[2])}, ${rgba.length > 3 ? rgba[3] : 1})` : color;
+    crtColors.set(color, mapped);
+    return mapped;
+}
+
+const crtStyles = new WeakMap();
+
+function crtStyle(style) {
+    let mapped = crtStyles.get(style);
+    if (mapped) return mapped;
+    mapped = {
+        ...style,
+        color: crtColor(style.color),
+        stroke: style.stroke && { ...style.stroke, color: crtColor(style.stroke.color) },
+        shadows: style.shadows.map(sh => ({ ...sh, color: crtColor(sh.color) })),
+        gradient: style.gradient && { ...style.gradient, colors: style.gradient.colors.map(crtColor) },
+        background: crtColor(style.background),
+        dropShadow: style.dropShadow && { ...style.dropShadow, color: crtColor(style.dropShadow.color) },
+    };
+    crtStyles.set(style, mapped);
+    return mapped;
+}
@@ -0,0 +1,11 @@
+// === 上传 Worker 入口 ===
+// 运行时和 scene-draw.js 拼成一个 Blob 启动（见 main.js 的 UploadClient）。
+// 大图的解码、缩放和重新编码都在这里做，主线程只拿到缩小后的结果。
+self.onmessage = async (e) => {
+    const { id, file, width, height } = e.data;
+    try {
+        self.postMessage({ id, blob: await transcodeImage(file, width, height) });
+    } catch (err) {
+        self.postMessage({ id, error: String(err) });
+    }
+};
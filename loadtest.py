@@ -0,0 +1,237 @@
+"""多会话压测：本地起一个 streamlit 服务，用 N 个模拟浏览器会话（websocket）触发重跑。
+
+按 --steps 逐级加会话，每一级所有会话同时重跑 --reruns 次（带场景 token，模拟前端同步场景）。
+记录每级的重跑延迟、每个会话占用的内存、服务端 CPU，找出撑不住的那一级；
+可以存成基线，之后用 --gate 做回归检查（超出容差时退出码非 0）：
+    python loadtest.py --steps 1,10,100,1000 --save loadtest_baseline.json
+    python loadtest.py --steps 1,10,100,1000 --gate loadtest_baseline.json
+上千个会话需要调高文件描述符上限（ulimit -n）。
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from websockets.asyncio.client import connect
+
+from bench import demo_scene, percentile
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(BASE_DIR, "app.py")
+# 重跑延迟超过这个值（p95）就算撑不住了
+LATENCY_BUDGET_MS = 1000
+# 回归检查的容差
+GATE_TOLERANCE = 0.25
+_GATED = ("p95_ms", "rss_per_session_kb")
+# 单次重跑等这么久还没结束就记一次错误，免得整个压测卡住
+RERUN_TIMEOUT = 60
+
+
+# === 服务端 ===
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port):
+    env = dict(os.environ, PASSION_ASSET_PORT="0")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP, "--server.headless", "true",
+         "--server.address", "127.0.0.1", "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as r:
+                if r.status == 200:
+                    return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("streamlit server did not start")
+
+
+def process_stats(pid):
+    """(常驻内存 KB, 累计 CPU 秒)。有 psutil 用 psutil，否则读 /proc（仅 Linux）。"""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        proc = psutil.Process(pid)
+        cpu = proc.cpu_times()
+        return proc.memory_info().rss / 1024, cpu.user + cpu.system
+    with open(f"/proc/{pid}/status") as f:
+        rss = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return rss, (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+# === 模拟会话 ===
+class Session:
+    """一个浏览器标签页：连上 websocket，发 rerun_script，等 script_finished。"""
+
+    def __init__(self, url, origin):
+        self.url = url
+        self.origin = origin
+        self.ws = None
+        self.component_id = None
+        self.bytes = 0
+
+    async def open(self):
+        self.ws = await connect(self.url, subprotocols=["streamlit"], origin=self.origin,
+                                max_size=None, open_timeout=60, ping_interval=None)
+        # 首次运行，顺便记下页面组件的 widget id
+        return await self.rerun(None)
+
+    async def rerun(self, scene):
+        msg = BackMsg()
+        state = msg.rerun_script
+        # 赋值才会选中 oneof，空消息服务端直接忽略
+        state.query_string = ""
+        if scene is not None and self.component_id:
+            widget = state.widget_states.widgets.add()
+            widget.id = self.component_id
+            widget.json_value = json.dumps(scene)
+        started = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        while True:
+            data = await asyncio.wait_for(self.ws.recv(), RERUN_TIMEOUT)
+            self.bytes += len(data)
+            fwd = ForwardMsg()
+            fwd.ParseFromString(data)
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                if element.WhichOneof("type") == "component_instance":
+                    self.component_id = element.component_instance.id
+            elif kind == "script_finished":
+                return (time.perf_counter() - started) * 1000
+
+    async def close(self):
+        await self.ws.close()
+
+
+async def run_step(sessions, reruns, scene):
+    async def one(session):
+        return [await session.rerun(scene) for _ in range(reruns)]
+
+    results = await asyncio.gather(*(one(s) for s in sessions), return_exceptions=True)
+    latencies = [ms for r in results if not isinstance(r, BaseException) for ms in r]
+    errors = sum(isinstance(r, BaseException) for r in results)
+    return latencies, errors
+
+
+async def load_test(port, steps, reruns):
+    url = f"ws://127.0.0.1:{port}/_stcore/stream"
+    origin = f"http://127.0.0.1:{port}"
+    server = start_server(port)
+    scene = demo_scene()
+    sessions, results = [], []
+    try:
+        # 等第一次导入完成再取基线
+        probe = Session(url, origin)
+        await probe.open()
+        await probe.close()
+        await asyncio.sleep(1)
+        base_rss, _ = process_stats(server.pid)
+        for target in steps:
+            # 会话逐级累加，连接本身也是负载的一部分
+            opening = [Session(url, origin) for _ in range(target - len(sessions))]
+            opened = await asyncio.gather(*(s.open() for s in opening), return_exceptions=True)
+            sessions += [s for s, r in zip(opening, opened) if not isinstance(r, BaseException)]
+            open_errors = sum(isinstance(r, BaseException) for r in opened)
+
+            rss_before, cpu_before = process_stats(server.pid)
+            bytes_before = sum(s.bytes for s in sessions)
+            started = time.perf_counter()
+            latencies, errors = await run_step(sessions, reruns, scene)
+            wall = time.perf_counter() - started
+            rss, cpu = process_stats(server.pid)
+
+            step = {
+                "sessions": len(sessions),
+                "reruns": len(latencies),
+                "errors": errors + open_errors,
+                "median_ms": statistics.median(latencies) if latencies else None,
+                "p95_ms": percentile(latencies, 0.95) if latencies else None,
+                "p99_ms": percentile(latencies, 0.99) if latencies else None,
+                "reruns_per_s": len(latencies) / wall,
+                "server_cpu_pct": (cpu - cpu_before) / wall * 100,
+                "server_rss_mb": rss / 1024,
+                "rss_per_session_kb": (rss - base_rss) / max(len(sessions), 1),
+                "rss_growth_mb": (rss - rss_before) / 1024,
+                "bytes_per_rerun": (sum(s.bytes for s in sessions) - bytes_before) / max(len(latencies), 1),
+            }
+            results.append(step)
+            print(json.dumps(step), file=sys.stderr)
+            if step["errors"] or (step["p95_ms"] or 0) > LATENCY_BUDGET_MS:
+                step["tipped"] = True
+                break
+    finally:
+        await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+    return results
+
+
+# === 回归检查 ===
+def gate(results, baseline, tolerance):
+    """和基线同样会话数的每一级比较 p95 延迟和每会话内存，返回超出容差的项。"""
+    old = {step["sessions"]: step for step in baseline}
+    failures = []
+    for step in results:
+        before = old.get(step["sessions"])
+        if before is None:
+            continue
+        for key in _GATED:
+            if before.get(key) and step.get(key) is not None and step[key] > before[key] * (1 + tolerance):
+                failures.append(f"{step['sessions']} sessions: {key} {before[key]:.1f} -> {step[key]:.1f}")
+        if step["errors"] > before.get("errors", 0):
+            failures.append(f"{step['sessions']} sessions: errors {before.get('errors', 0)} -> {step['errors']}")
+    if results and results[-1].get("tipped") and results[-1]["sessions"] < baseline[-1]["sessions"]:
+        failures.append(f"tipped over at {results[-1]['sessions']} sessions (baseline reached {baseline[-1]['sessions']})")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", default="1,10,50,100,250,500,1000", help="逗号分隔的会话数，逐级加压")
+    parser.add_argument("--reruns", type=int, default=3, help="每一级每个会话重跑的次数")
+    parser.add_argument("--port", type=int, default=0, help="默认随便找一个空闲端口")
+    parser.add_argument("--save", metavar="PATH", help="把结果存成基线 JSON")
+    parser.add_argument("--gate", metavar="PATH", help="和基线比较，超出容差时退出码为 1")
+    parser.add_argument("--tolerance", type=float, default=GATE_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    steps = sorted({int(n) for n in args.steps.split(",") if n.strip()})
+    results = asyncio.run(load_test(args.port or _free_port(), steps, args.reruns))
+    json.dump(results, sys.stdout, indent=2)
+    print()
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.gate:
+        with open(args.gate, encoding="utf-8") as f:
+            failures = gate(results, json.load(f), args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
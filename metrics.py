@@ -0,0 +1,169 @@
+"""前端性能统计：页面定期上报帧间隔、animate() 耗时、长任务和导出耗时（见 main.js 的 PerfMetrics），按会话汇总。
+
+资源服务上 POST /metrics 接收上报，GET /metrics.json 查看各会话和全体的汇总；每次上报同时打一行日志。
+"""
+import json
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# 帧间隔分档上限（ms），最后一档是 100ms 以上；和 main.js 的 FRAME_BUCKETS 一致
+FRAME_BUCKETS = (8, 17, 25, 34, 50, 100)
+MAX_SESSIONS = 256
+# 超过这么久没上报的会话从汇总里去掉
+SESSION_TTL = 3600
+
+_COUNTERS = ("interval", "frames", "frameMs", "animateMs", "longTasks", "longTaskMs", "exports", "exportMs")
+_MAXIMA = ("frameMax", "animateMax", "exportMax")
+
+
+class SessionMetrics:
+    __slots__ = ("reports", "renderer", "floaters", "last_seen", "counters", "maxima", "frame_buckets")
+
+    def __init__(self):
+        self.reports = 0
+        self.renderer = None
+        self.floaters = 0
+        self.last_seen = 0.0
+        self.counters = dict.fromkeys(_COUNTERS, 0.0)
+        self.maxima = dict.fromkeys(_MAXIMA, 0.0)
+        self.frame_buckets = [0] * (len(FRAME_BUCKETS) + 1)
+
+    def add(self, report, now):
+        self.reports += 1
+        self.renderer = report.get("renderer")
+        self.floaters = report.get("floaters", 0)
+        self.last_seen = now
+        for key in _COUNTERS:
+            self.counters[key] += report.get(key, 0)
+        for key in _MAXIMA:
+            self.maxima[key] = max(self.maxima[key], report.get(key, 0))
+        for i, n in enumerate(report.get("frameBuckets", ())[:len(self.frame_buckets)]):
+            self.frame_buckets[i] += n
+
+    def merge(self, other):
+        self.reports += other.reports
+        for key in _COUNTERS:
+            self.counters[key] += other.counters[key]
+        for key in _MAXIMA:
+            self.maxima[key] = max(self.maxima[key], other.maxima[key])
+        for i, n in enumerate(other.frame_buckets):
+            self.frame_buckets[i] += n
+
+    def frame_percentile(self, q):
+        # 按分档估算：落在哪一档就取那一档的上限，最后一档取观测到的最大值
+        total = sum(self.frame_buckets)
+        if not total:
+            return None
+        seen = 0
+        for i, n in enumerate(self.frame_buckets):
+            seen += n
+            if seen >= q * total:
+                return FRAME_BUCKETS[i] if i < len(FRAME_BUCKETS) else round(self.maxima["frameMax"], 1)
+        return None
+
+    def summary(self):
+        c, m = self.counters, self.maxima
+        per = lambda total, n: round(total / n, 2) if n else None
+        return {
+            "reports": self.reports,
+            "renderer": self.renderer,
+            "floaters": self.floaters,
+            "seconds": round(c["interval"] / 1000, 1),
+            "frames": int(c["frames"]),
+            "frame_ms_mean": per(c["frameMs"], c["frames"]),
+            "frame_ms_p95": self.frame_percentile(0.95),
+            "frame_ms_max": round(m["frameMax"], 1),
+            "frame_buckets": dict(zip([f"<={b}" for b in FRAME_BUCKETS] + [f">{FRAME_BUCKETS[-1]}"], self.frame_buckets)),
+            "animate_ms_mean": per(c["animateMs"], c["frames"]),
+            "animate_ms_max": round(m["animateMax"], 2),
+            "long_tasks": int(c["longTasks"]),
+            "long_task_ms": round(c["longTaskMs"], 1),
+            "exports": int(c["exports"]),
+            "export_ms_mean": per(c["exportMs"], c["exports"]),
+            "export_ms_max": round(m["exportMax"], 1),
+        }
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not (math.isfinite(value) and value >= 0):
+        raise ValueError("bad metric value")
+    return value
+
+
+def parse_report(body):
+    """校验上报内容，只留认识的字段；格式不对时抛 ValueError。"""
+    try:
+        raw = json.loads(body)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("bad metrics report") from e
+    if not isinstance(raw, dict) or not isinstance(raw.get("session"), str) or not raw["session"]:
+        raise ValueError("bad metrics report")
+    report = {"session": raw["session"][:64], "renderer": str(raw.get("renderer", ""))[:16]}
+    for key in _COUNTERS + _MAXIMA + ("floaters",):
+        report[key] = _number(raw.get(key, 0))
+    buckets = raw.get("frameBuckets", [])
+    if not isinstance(buckets, list):
+        raise ValueError("bad frame buckets")
+    report["frameBuckets"] = [int(_number(n)) for n in buckets[:len(FRAME_BUCKETS) + 1]]
+    return report
+
+
+class MetricsStore:
+    def __init__(self, max_sessions=MAX_SESSIONS, ttl=SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()
+
+    def add(self, report):
+        now = time.time()
+        with self._lock:
+            session = self._sessions.pop(report["session"], None) or SessionMetrics()
+            session.add(report, now)
+            self._sessions[report["session"]] = session
+            # 最久没上报的排在前面
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        s = session.summary()
+        logger.info(
+            "metrics %s: %d floaters, %d frames, frame mean %s ms / max %s ms, animate mean %s ms, "
+            "%d long tasks, %d exports",
+            report["session"], s["floaters"], report["frames"], s["frame_ms_mean"], s["frame_ms_max"],
+            s["animate_ms_mean"], report["longTasks"], report["exports"],
+        )
+
+    def summary(self):
+        now = time.time()
+        total = SessionMetrics()
+        sessions = {}
+        with self._lock:
+            for key in [k for k, v in self._sessions.items() if now - v.last_seen > self.ttl]:
+                del self._sessions[key]
+            for key, session in self._sessions.items():
+                sessions[key] = session.summary()
+                total.merge(session)
+        overall = total.summary()
+        # 全体汇总里单个会话的字段没有意义
+        for key in ("renderer", "floaters"):
+            overall.pop(key)
+        return {"sessions": len(sessions), "total": overall, "by_session": sessions}
+
+
+def make_metrics_routes(store):
+    """返回 (POST /metrics 上报路由, GET /metrics.json 汇总路由)。"""
+    from assets import NO_STORE, Asset
+
+    def report_route(query, body):
+        store.add(parse_report(body))
+        return None
+
+    def summary_route(query):
+        data = json.dumps(store.summary(), indent=2).encode()
+        return Asset("metrics.json", data, "application/json", cache_control=NO_STORE)
+
+    return report_route, summary_route
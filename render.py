@@ -0,0 +1,495 @@
+"""无浏览器的 meme 渲染引擎。
+
+复刻前端的分词（segmentText）、网格 + 抖动排布（Floater 构造函数）、
+十种随机样式（applyRandomStyle）和背景预设，直接用 Pillow 输出图片。
+"""
+import functools
+import io
+import math
+import os
+import random
+import re
+
+import numpy as np
+from PIL import Image, ImageChops, ImageColor, ImageDraw, ImageFilter, ImageFont, ImageOps
+
+from fonts import find_font_for_text
+from segmentation import MAX_FALLBACK_CHARS, has_dictionary, segment
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BLISS_PATH = os.path.join(BASE_DIR, "static", "bliss.jpeg")
+
+DEFAULT_WIDTH = 700
+DEFAULT_HEIGHT = 525
+DEFAULT_SCALE = 2
+SAFE_BUFFER = 30
+ITALIC_SHEAR = 0.2
+
+FONT_FAMILIES = ['"Comic Sans MS"', "Impact", '"Times New Roman"', "Arial Black", "Papyrus", "Courier New", "Verdana", '"Brush Script MT"']
+
+# 和 frontend/main.js 的 highSatGradients 一一对应
+HIGH_SAT_GRADIENTS = [
+    {"type": "linear", "angle": 180, "stops": [("#FF0000", 0), ("#FF7F00", 0.15), ("#FFFF00", 0.3), ("#00FF00", 0.5), ("#0000FF", 0.7), ("#4B0082", 0.85), ("#9400D3", 1)]},
+    {"type": "linear", "angle": 45, "stops": [("#FF0000", None), ("#FFFF00", None), ("#0000FF", None), ("#FF0000", None)]},
+    {"type": "linear", "angle": 135, "stops": [("#FF00CC", 0), ("#333399", 1)]},
+    {"type": "linear", "angle": 90, "stops": [("#00FF00", None), ("#FF00FF", None), ("#00FFFF", None), ("#FFFF00", None)]},
+    {"type": "radial", "stops": [("#FFFF00", 0), ("#FF0000", 1)]},
+    {"type": "linear", "angle": 120, "stops": [("#e4ff00", 0), ("#ff0055", 0.5), ("#00ccff", 1)]},
+    {"type": "linear", "corner": "bottom right", "stops": [("#2C3E50", None), ("#FD746C", None)]},
+    {"type": "linear", "angle": 180, "stops": [("#00F260", None), ("#0575E6", None)]},
+]
+SOLID_BACKGROUNDS = {"white": "#ffffff", "win98": "#008080"}
+BACKGROUNDS = ("white", "win98", "rainbow", "bliss")
+
+
+# === 随机数（和 frontend/styles.js 的 hashSeed / mulberry32 逐位一致）===
+_U32 = 0xFFFFFFFF
+
+
+def hash_seed(seed):
+    h = 0x811C9DC5
+    data = str(seed).encode("utf-16-le")
+    for i in range(0, len(data), 2):
+        h = ((h ^ (data[i] | data[i + 1] << 8)) * 0x01000193) & _U32
+    return h
+
+
+class Mulberry32:
+    """只实现 random()，够 random_style / build_scene 用。"""
+
+    def __init__(self, seed):
+        self.state = hash_seed(seed)
+
+    def random(self):
+        self.state = (self.state + 0x6D2B79F5) & _U32
+        a = self.state
+        t = ((a ^ (a >> 15)) * (a | 1)) & _U32
+        t = ((t + ((t ^ (t >> 7)) * (t | 61))) & _U32) ^ t
+        return ((t ^ (t >> 14)) & _U32) / 4294967296
+
+
+def scene_rng(seed=None):
+    return random.Random() if seed is None else Mulberry32(seed)
+
+
+# === 分词 ===
+def segment_text(text):
+    words = list(segment(text))
+    # 没有词典又没有空格时基本是逐字切的，和前端一样限制字数
+    if " " not in text.strip() and not has_dictionary():
+        words = words[:MAX_FALLBACK_CHARS]
+    return words
+
+
+# === 样式（对应 frontend/styles.js 的 createRandomStyle）===
+def canvas_scale(width):
+    return max(0.4, min(1, width / 700))
+
+
+HUE_STEPS = 24
+GRADIENT_ANGLES = 24
+
+
+def hue_color(hue):
+    return f"hsl({hue * (360 // HUE_STEPS)}, 100%, 50%)"
+
+
+def _js_round(x):
+    # Math.round：.5 向上取整（Python 的 round 是银行家舍入）
+    return math.floor(x + 0.5)
+
+
+def random_style(rng, scale):
+    style = {
+        "type": math.floor(rng.random() * 10),
+        "font": FONT_FAMILIES[math.floor(rng.random() * len(FONT_FAMILIES))],
+        "size": math.floor(rng.random() * (120 * scale)) + _js_round(30 * scale),
+        "padding": (_js_round(25 * scale), _js_round(25 * scale)),
+        "color": None,
+        "stroke": None,
+        "paint_order": None,
+        "shadows": [],
+        "gradient": None,
+        "background": None,
+        "italic": False,
+        "drop_shadow": None,
+        "scale_x": 1, "scale_y": 1, "skew": 0, "rotate": None,
+    }
+    style["palette"] = [math.floor(rng.random() * HUE_STEPS) for _ in range(3)]
+    color1, color2, color3 = (hue_color(h) for h in style["palette"])
+    kind = style["type"]
+
+    if kind == 0:
+        style["color"] = "#fff"
+        style["stroke"] = (2, "black")
+        style["shadows"] = [(4, 4, 0, color1), (8, 8, 0, color2)]
+    elif kind == 1:
+        style["gradient"] = (math.floor(rng.random() * GRADIENT_ANGLES) * (360 // GRADIENT_ANGLES), [color1, color2, color3])
+        style["skew"] = rng.random() * 30 - 15
+    elif kind == 2:
+        style["color"] = color1
+        style["stroke"] = (4, "black")
+        style["paint_order"] = "stroke fill"
+    elif kind == 3:
+        style["color"] = "#00ff00"
+        style["shadows"] = [(-3, 0, 0, "red"), (3, 0, 0, "blue")]
+        style["font"] = '"Courier New", monospace'
+    elif kind == 4:
+        style["color"] = color1
+        style["scale_x"] = 0.6 + rng.random() * 1.2
+        style["scale_y"] = 0.6 + rng.random() * 0.8
+        style["skew"] = rng.random() * 40 - 20
+        if rng.random() > 0.5:
+            style["stroke"] = (1, "black")
+    elif kind == 5:
+        style["color"] = color1
+        if rng.random() > 0.5:
+            sx, sy = 1.5 + rng.random() * 1.5, 0.6 + rng.random() * 0.2
+        else:
+            sx, sy = 0.4 + rng.random() * 0.3, 1.5 + rng.random() * 1.5
+        style["scale_x"], style["scale_y"] = round(sx, 2), round(sy, 2)
+        if rng.random() > 0.5:
+            style["stroke"] = (1, "black")
+    elif kind == 6:
+        style["color"] = "white"
+        style["shadows"] = [(0, 0, blur, color1) for blur in (5, 10, 20)]
+    elif kind == 7:
+        style["color"] = "rgba(255,255,255,0.8)"
+        style["shadows"] = [(5, 5, 0, color1), (10, 10, 0, "rgba(0,0,0,0.2)")]
+        style["italic"] = True
+    elif kind == 8:
+        style["color"] = "black"
+        style["background"] = color1
+        style["padding"] = (_js_round(10 * scale), _js_round(20 * scale))
+        style["rotate"] = rng.random() * 10 - 5
+    else:
+        style["color"] = "transparent"
+        style["stroke"] = (2, color1)
+        style["drop_shadow"] = (3, 3, color2)
+
+    if style["rotate"] is None:
+        style["rotate"] = math.floor(rng.random() * 60) - 30
+    return style
+
+
+# === 排布（对应 Floater 构造函数）===
+class Floater:
+    __slots__ = ("text", "style", "x", "y", "vx", "vy", "w", "h")
+
+    def __init__(self, text, style, x, y, vx, vy):
+        self.text = text
+        self.style = style
+        self.x, self.y = x, y
+        self.vx, self.vy = vx, vy
+        self.w, self.h = measure_text(text, style)
+
+
+def build_scene(words, width, height, rng):
+    scale = canvas_scale(width)
+    safe_margin = 60 * scale
+    available_width = width - 100 * scale - safe_margin * 2
+    available_height = height - 100 * scale - safe_margin * 2
+    total = len(words)
+    floaters = []
+    for index, word in enumerate(words):
+        # 和前端一样：先取样式的随机数，再取位置抖动和初速度
+        style = random_style(rng, scale)
+        cols = math.ceil(math.sqrt(total))
+        rows = math.ceil(total / cols)
+        cell_width = available_width / cols
+        cell_height = available_height / rows
+        base_x = safe_margin + (index % cols) * cell_width
+        base_y = safe_margin + (index // cols) * cell_height
+        x = base_x + rng.random() * (cell_width * 0.6)
+        y = base_y + rng.random() * (cell_height * 0.6)
+        vx = (rng.random() - 0.5) * 0.5
+        vy = (rng.random() - 0.5) * 0.5
+        floater = Floater(word, style, x, y, vx, vy)
+        # 静态出图时相当于物理第一步的贴边约束
+        floater.x = min(max(floater.x, SAFE_BUFFER), width - floater.w - SAFE_BUFFER)
+        floater.y = min(max(floater.y, SAFE_BUFFER), height - floater.h - SAFE_BUFFER)
+        floaters.append(floater)
+    return floaters
+
+
+# === 颜色与渐变 ===
+_RGBA = re.compile(r"rgba\(\s*([\d.]+)\s*,\s*([\d.]+)\s*,\s*([\d.]+)\s*,\s*([\d.]+)\s*\)")
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_color(css):
+    css = css.strip()
+    if css == "transparent":
+        return (0, 0, 0, 0)
+    m = _RGBA.fullmatch(css)
+    if m:
+        r, g, b, a = m.groups()
+        return (int(float(r)), int(float(g)), int(float(b)), round(float(a) * 255))
+    rgb = ImageColor.getrgb(css)
+    return rgb if len(rgb) == 4 else rgb + (255,)
+
+
+def _gradient_fill(t, stops):
+    n = len(stops)
+    offsets = [i / (n - 1) if offset is None else offset for i, (_, offset) in enumerate(stops)]
+    colors = np.array([parse_color(color) for color, _ in stops], dtype=np.float32)
+    t = np.clip(t, 0, 1)
+    channels = [np.interp(t, offsets, colors[:, c]) for c in range(4)]
+    return Image.fromarray(np.stack(channels, axis=-1).round().astype(np.uint8), "RGBA")
+
+
+def linear_gradient(size, angle, stops, box=None):
+    """CSS linear-gradient：0deg 朝上、顺时针；box 是渐变覆盖的盒子 (x, y, w, h)。"""
+    width, height = size
+    bx, by, bw, bh = box or (0, 0, width, height)
+    rad = math.radians(angle)
+    dx, dy = math.sin(rad), -math.cos(rad)
+    half = (abs(bw * dx) + abs(bh * dy)) / 2 or 1
+    ys, xs = np.mgrid[0:height, 0:width].astype(np.float32) + 0.5
+    t = ((xs - (bx + bw / 2)) * dx + (ys - (by + bh / 2)) * dy + half) / (2 * half)
+    return _gradient_fill(t, stops)
+
+
+def radial_gradient(size, stops):
+    width, height = size
+    ys, xs = np.mgrid[0:height, 0:width].astype(np.float32) + 0.5
+    t = np.hypot(xs - width / 2, ys - height / 2) / (math.hypot(width, height) / 2)
+    return _gradient_fill(t, stops)
+
+
+def corner_angle(corner, width, height):
+    to_right = 1 if "right" in corner else -1
+    to_bottom = 1 if "bottom" in corner else -1
+    return math.degrees(math.atan2(to_right * height, -to_bottom * width))
+
+
+# === 背景 ===
+def parse_background(spec, rng=None):
+    """'white' / 'win98' / 'bliss' / 'rainbow'（随机一款）/ 'rainbow:3' / 图片路径 → 背景描述。"""
+    if spec in SOLID_BACKGROUNDS:
+        return {"kind": "color", "color": SOLID_BACKGROUNDS[spec]}
+    if spec == "rainbow" or spec.startswith("rainbow:"):
+        if ":" in spec:
+            index = int(spec.split(":", 1)[1]) % len(HIGH_SAT_GRADIENTS)
+        else:
+            index = math.floor((rng or random).random() * len(HIGH_SAT_GRADIENTS))
+        return {"kind": "gradient", "spec": HIGH_SAT_GRADIENTS[index], "index": index}
+    path = BLISS_PATH if spec == "bliss" else spec
+    if os.path.exists(path):
+        return {"kind": "image", "path": path}
+    return {"kind": "color", "color": "#ffffff"}
+
+
+@functools.lru_cache(maxsize=16)
+def _load_background_image(path, size):
+    with Image.open(path) as image:
+        # center/cover no-repeat
+        return ImageOps.fit(image.convert("RGBA"), size, Image.LANCZOS, centering=(0.5, 0.5))
+
+
+def draw_background(background, size):
+    if background["kind"] == "gradient":
+        spec = HIGH_SAT_GRADIENTS[background["index"]] if "index" in background else background["spec"]
+        if spec["type"] == "radial":
+            return radial_gradient(size, spec["stops"])
+        angle = corner_angle(spec["corner"], *size) if "corner" in spec else spec["angle"]
+        return linear_gradient(size, angle, spec["stops"])
+    if background["kind"] == "image":
+        return _load_background_image(background["path"], size).copy()
+    return Image.new("RGBA", size, parse_color(background["color"]))
+
+
+def apply_scanlines(image, scale):
+    """#meme-canvas::after 的 4x4 斜纹，overlay 混合、25% 不透明度。"""
+    width, height = image.size
+    ys, xs = np.mgrid[0:height, 0:width]
+    tile = (((xs // scale).astype(int) + (ys // scale).astype(int)) % 4) == 3
+    base = np.asarray(image, dtype=np.float32)
+    rgb = base[..., :3] / 255
+    top = 0xAA / 255
+    overlay = np.where(rgb < 0.5, 2 * rgb * top, 1 - 2 * (1 - rgb) * (1 - top))
+    mixed = np.where(tile[..., None], rgb + (overlay - rgb) * 0.25, rgb)
+    base[..., :3] = mixed * 255
+    return Image.fromarray(base.round().astype(np.uint8), "RGBA")
+
+
+# === 文字栅格化（对应 frontend/renderers.js 的 rasterizeText）===
+@functools.lru_cache(maxsize=256)
+def load_font(path, px):
+    if path:
+        return ImageFont.truetype(path, px)
+    return ImageFont.load_default(px)
+
+
+def measure_text(text, style):
+    font = load_font(find_font_for_text(style["font"], text), max(1, round(style["size"])))
+    pad_y, pad_x = style["padding"]
+    return font.getlength(text) + pad_x * 2, style["size"] * 1.2 + pad_y * 2
+
+
+def _mask(size, text, font, xy, grow=0):
+    mask = Image.new("L", size, 0)
+    ImageDraw.Draw(mask).text(xy, text, font=font, fill=255, anchor="lm", stroke_width=grow, stroke_fill=255)
+    return mask
+
+
+def _stroke_ring(size, text, font, xy, width):
+    # -webkit-text-stroke 以轮廓线为中心，内外各占一半
+    outer = _mask(size, text, font, xy, grow=max(1, round(width / 2)))
+    inner = _mask(size, text, font, xy)
+    erode = int(width // 2)
+    if erode >= 1:
+        inner = inner.filter(ImageFilter.MinFilter(2 * erode + 1))
+    return ImageChops.subtract(outer, inner)
+
+
+def _paint(layer, mask, fill):
+    source = fill.copy() if isinstance(fill, Image.Image) else Image.new("RGBA", layer.size, parse_color(fill))
+    source.putalpha(ImageChops.multiply(source.getchannel("A"), mask))
+    layer.alpha_composite(source)
+
+
+def rasterize_text(text, style, dpr):
+    """返回 (位图, 盒子宽, 盒子高, 外扩边距)，尺寸单位是 CSS 像素，位图按 dpr 放大。"""
+    w, h = measure_text(text, style)
+    reach = style["stroke"][0] if style["stroke"] else 0
+    for sx, sy, blur, _ in style["shadows"]:
+        reach = max(reach, abs(sx) + blur * 2, abs(sy) + blur * 2)
+    if style["drop_shadow"]:
+        reach = max(reach, abs(style["drop_shadow"][0]), abs(style["drop_shadow"][1]))
+    bleed = math.ceil(reach + style["size"] * (0.3 if style["italic"] else 0.1) + 4)
+
+    size = (math.ceil((w + bleed * 2) * dpr), math.ceil((h + bleed * 2) * dpr))
+    font = load_font(find_font_for_text(style["font"], text), max(1, round(style["size"] * dpr)))
+    pad_y, pad_x = style["padding"]
+    origin = ((bleed + pad_x) * dpr, (bleed + h / 2) * dpr)
+    box = (bleed * dpr, bleed * dpr, w * dpr, h * dpr)
+    layer = Image.new("RGBA", size, (0, 0, 0, 0))
+
+    if style["background"]:
+        ImageDraw.Draw(layer).rectangle([box[0], box[1], box[0] + box[2], box[1] + box[3]], fill=parse_color(style["background"]))
+
+    def glyphs(target, offset, fill, stroke_color):
+        xy = (origin[0] + offset[0] * dpr, origin[1] + offset[1] * dpr)
+        steps = []
+        if fill:
+            steps.append(lambda: _paint(target, _mask(size, text, font, xy), fill))
+        if style["stroke"]:
+            steps.append(lambda: _paint(target, _stroke_ring(size, text, font, xy, style["stroke"][0] * dpr), stroke_color))
+        if style["paint_order"] == "stroke fill":
+            steps.reverse()
+        for step in steps:
+            step()
+
+    # text-shadow：列表里靠前的在上层，所以倒着画
+    for sx, sy, blur, color in reversed(style["shadows"]):
+        if blur:
+            shadow = Image.new("RGBA", size, (0, 0, 0, 0))
+            glyphs(shadow, (sx, sy), color, color)
+            layer.alpha_composite(shadow.filter(ImageFilter.GaussianBlur(blur * dpr / 2)))
+        else:
+            glyphs(layer, (sx, sy), color, color)
+
+    if style["gradient"]:
+        angle, colors = style["gradient"]
+        fill = linear_gradient(size, angle, [(c, None) for c in colors], box)
+    elif style["color"] and style["color"] != "transparent":
+        fill = style["color"]
+    else:
+        fill = None
+    stroke_color = style["stroke"][1] if style["stroke"] else None
+
+    if style["drop_shadow"]:
+        dx, dy, color = style["drop_shadow"]
+        body = Image.new("RGBA", size, (0, 0, 0, 0))
+        glyphs(body, (0, 0), fill, stroke_color)
+        shadow = Image.new("RGBA", size, parse_color(color))
+        shadow.putalpha(ImageChops.multiply(body.getchannel("A"), Image.new("L", size, parse_color(color)[3])))
+        layer.alpha_composite(ImageChops.offset(shadow, round(dx * dpr), round(dy * dpr)))
+        layer.alpha_composite(body)
+    else:
+        glyphs(layer, (0, 0), fill, stroke_color)
+
+    if style["italic"]:
+        # 没有斜体字形文件时用错切合成斜体（以文字中线为轴）
+        cy = origin[1]
+        layer = layer.transform(size, Image.AFFINE, (1, ITALIC_SHEAR, -ITALIC_SHEAR * cy, 0, 1, 0), resample=Image.BICUBIC)
+    return layer, w, h, bleed
+
+
+def _composite_at(canvas, image, x, y):
+    # alpha_composite 不接受负偏移，先裁掉超出画布的部分
+    left, top = max(0, -x), max(0, -y)
+    right = min(image.width, canvas.width - x)
+    bottom = min(image.height, canvas.height - y)
+    if right <= left or bottom <= top:
+        return
+    canvas.alpha_composite(image.crop((left, top, right, bottom)), dest=(x + left, y + top))
+
+
+def draw_floater(canvas, layer, cx, cy, style, dpr):
+    """以盒子中心为原点依次 scale → skew → rotate，和 CSS transform 的顺序一致。"""
+    rad = math.radians(style["rotate"])
+    cos, sin = math.cos(rad), math.sin(rad)
+    skew = math.tan(math.radians(style["skew"]))
+    sx, sy = style["scale_x"], style["scale_y"]
+    # M = S · K · R
+    m00, m01 = sx * (cos + skew * sin), sx * (-sin + skew * cos)
+    m10, m11 = sy * sin, sy * cos
+    # 只变换有内容的部分，外扩边距大多是空的
+    bbox = layer.getbbox()
+    if bbox is None:
+        return
+    ox = (bbox[0] + bbox[2] - layer.width) / 2
+    oy = (bbox[1] + bbox[3] - layer.height) / 2
+    cx, cy = cx * dpr + m00 * ox + m01 * oy, cy * dpr + m10 * ox + m11 * oy
+    layer = layer.crop(bbox)
+    lw, lh = layer.size
+    xs = [m00 * px + m01 * py for px in (-lw / 2, lw / 2) for py in (-lh / 2, lh / 2)]
+    ys = [m10 * px + m11 * py for px in (-lw / 2, lw / 2) for py in (-lh / 2, lh / 2)]
+    ow, oh = math.ceil(max(xs) - min(xs)), math.ceil(max(ys) - min(ys))
+    det = m00 * m11 - m01 * m10
+    i00, i01, i10, i11 = m11 / det, -m01 / det, -m10 / det, m00 / det
+    data = (i00, i01, lw / 2 - i00 * ow / 2 - i01 * oh / 2,
+            i10, i11, lh / 2 - i10 * ow / 2 - i11 * oh / 2)
+    placed = layer.transform((ow, oh), Image.AFFINE, data, resample=Image.BICUBIC)
+    _composite_at(canvas, placed, round(cx - ow / 2), round(cy - oh / 2))
+
+
+# === 出图 ===
+_BACKGROUND_REF = {"color": "color", "gradient": "index", "image": "path"}
+
+
+@functools.lru_cache(maxsize=32)
+def _backdrop(kind, ref, size, scale):
+    return apply_scanlines(draw_background({"kind": kind, _BACKGROUND_REF[kind]: ref}, size), scale)
+
+
+def backdrop(background, size, scale):
+    """背景 + 扫描线；同一批里背景只有几种，算一次后复用。"""
+    if background["kind"] == "gradient" and "index" not in background:
+        return apply_scanlines(draw_background(background, size), scale)
+    kind = background["kind"]
+    return _backdrop(kind, background[_BACKGROUND_REF[kind]], size, scale).copy()
+
+
+def render_scene(floaters, background, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, scale=DEFAULT_SCALE):
+    size = (round(width * scale), round(height * scale))
+    canvas = backdrop(background, size, scale)
+    for f in floaters:
+        layer, w, h, bleed = rasterize_text(f.text, f.style, scale)
+        draw_floater(canvas, layer, f.x + f.w / 2, f.y + f.h / 2, f.style, scale)
+    return canvas.convert("RGB")
+
+
+def render_meme(text, background="bliss", width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, scale=DEFAULT_SCALE, seed=None):
+    # 背景单独取随机数，场景的随机序列和前端 spawnSentence 完全对齐
+    bg = parse_background(background, scene_rng(None if seed is None else f"{seed}:background"))
+    floaters = build_scene(segment_text(text), width, height, scene_rng(seed))
+    return render_scene(floaters, bg, width, height, scale)
+
+
+def encode_png(image):
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
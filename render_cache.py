@@ -0,0 +1,211 @@
+"""导出图片的磁盘缓存：按 (文字, 种子, 背景, 尺寸) 内容寻址，超出上限时淘汰。图片背景按文件内容算。
+
+配置（环境变量）：
+    PASSION_CACHE_DIR          缓存目录，默认 ./.render_cache
+    PASSION_CACHE_MAX_MB       总大小上限，默认 256
+    PASSION_CACHE_MAX_ENTRIES  文件数上限，默认 5000
+    PASSION_CACHE_EVICTION     lru（默认，命中会刷新）或 fifo（按写入顺序）
+
+应用和 render_cli 可以共用一个目录：命中直接按文件判断，别的进程写的也能命中；
+淘汰顺序记在文件修改时间上，写入时（最多每 RESCAN_INTERVAL 秒一次）重新扫描目录，上限按整个目录算。
+"""
+import functools
+import hashlib
+import json
+import logging
+import os
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+EVICTION_POLICIES = ("lru", "fifo")
+SUFFIX = ".png"
+# 写入时重新扫描目录的最短间隔（秒）：几千个文件扫一遍要几十毫秒，不能每张图都扫
+RESCAN_INTERVAL = 2.0
+# 单张图的输出像素上限（宽 × 高 × 倍率²），默认 700×525×2 约 150 万；再大一张图就能吃掉几百 MB 内存
+MAX_RENDER_PIXELS = 4_000_000
+
+
+@functools.lru_cache(maxsize=64)
+def _file_digest(path, mtime_ns, size):
+    # 按 (路径, 修改时间, 大小) 缓存，批量出图时同一张背景只读一次
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def _background_version(background):
+    # 图片路径背景（render_cli 用）按文件内容进键，原地改了图片不会一直拿到旧图
+    try:
+        info = os.stat(background)
+        if not stat.S_ISREG(info.st_mode):
+            return None
+        return _file_digest(os.path.abspath(background), info.st_mtime_ns, info.st_size)
+    except OSError:
+        return None
+
+
+def cache_key(text, seed, background, width, height, scale):
+    # 没有种子的场景每次都不一样，不能缓存
+    if seed is None:
+        return None
+    version = _background_version(background)
+    if version:
+        background = f"{background}@{version}"
+    payload = json.dumps([text, str(seed), background, width, height, scale], ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class RenderCache:
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, max_entries=5000, eviction="lru"):
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"unknown eviction policy: {eviction}")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.eviction = eviction
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = None  # key → 字节数，顺序就是淘汰顺序
+        self._bytes = 0
+        self._scanned_at = -RESCAN_INTERVAL
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.environ.get("PASSION_CACHE_DIR", os.path.join(BASE_DIR, ".render_cache")),
+            max_bytes=int(float(os.environ.get("PASSION_CACHE_MAX_MB", "256")) * 1024 * 1024),
+            max_entries=int(os.environ.get("PASSION_CACHE_MAX_ENTRIES", "5000")),
+            eviction=os.environ.get("PASSION_CACHE_EVICTION", "lru"),
+        )
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def _scan(self):
+        # 扫描整个目录（包括别的进程写的），按修改时间恢复淘汰顺序
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(SUFFIX) and entry.is_file():
+                try:
+                    info = entry.stat()
+                except OSError:
+                    continue
+                found.append((info.st_mtime_ns, entry.name[:-len(SUFFIX)], info.st_size))
+        found.sort()
+        self._entries = OrderedDict((key, size) for _, key, size in found)
+        self._bytes = sum(self._entries.values())
+        self._scanned_at = time.monotonic()
+        return self._entries
+
+    def _index(self):
+        return self._scan() if self._entries is None else self._entries
+
+    def get(self, key):
+        if key is None:
+            return None
+        with self._lock:
+            entries = self._index()
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+            except OSError:
+                # 没有这个文件，或者被别的进程淘汰了
+                if key in entries:
+                    self._bytes -= entries.pop(key)
+                self.misses += 1
+                return None
+            if key not in entries:
+                # 别的进程写的，收进索引
+                entries[key] = len(data)
+                self._bytes += len(data)
+            elif self.eviction == "lru":
+                entries.move_to_end(key)
+            if self.eviction == "lru":
+                try:
+                    os.utime(self._path(key))
+                except OSError:
+                    pass
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        if key is None:
+            return
+        with self._lock:
+            entries = self._index()
+            # 先写临时文件再改名，并发读不会读到半个文件
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+            # 隔一会儿重新扫描再淘汰：别的进程写进同一个目录的也算在上限里
+            if time.monotonic() - self._scanned_at >= RESCAN_INTERVAL:
+                self._scan()
+            else:
+                self._bytes += len(data) - entries.pop(key, 0)
+                entries[key] = len(data)
+            self._evict()
+
+    def _evict(self):
+        entries = self._entries
+        while entries and (len(entries) > self.max_entries or self._bytes > self.max_bytes):
+            key, size = entries.popitem(last=False)
+            self._bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            logger.debug("evicted %s (%d bytes)", key, size)
+
+    def get_or_render(self, key, render):
+        """render() 返回图片字节；命中缓存时不调用。"""
+        data = self.get(key)
+        if data is None:
+            data = render()
+            self.put(key, data)
+        return data
+
+    def stats(self):
+        with self._lock:
+            entries = self._index()
+            return {"entries": len(entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+def _bounded(query, name, default, low, high, cast=int):
+    value = cast(query.get(name, default))
+    if not low <= value <= high:
+        raise ValueError(f"{name} out of range")
+    return value
+
+
+def make_render_route(cache):
+    """资源服务的 /render.png?text=&seed=&background=&width=&height=&scale= 路由。"""
+
+    def route(query):
+        # Pillow / numpy 到第一次出图时才加载，不拖慢应用启动
+        import render
+        from assets import Asset
+
+        text = query.get("text", "")[:500]
+        seed = query.get("seed") or None
+        background = query.get("background", "bliss")
+        if background not in render.BACKGROUNDS and not background.startswith("rainbow:"):
+            raise ValueError("unknown background")
+        width = _bounded(query, "width", render.DEFAULT_WIDTH, 100, 2000)
+        height = _bounded(query, "height", render.DEFAULT_HEIGHT, 100, 2000)
+        scale = _bounded(query, "scale", render.DEFAULT_SCALE, 0.5, 4, float)
+        if width * height * scale ** 2 > MAX_RENDER_PIXELS:
+            raise ValueError("image too large")
+        key = cache_key(text, seed, background, width, height, scale)
+        data = cache.get_or_render(key, lambda: render.encode_png(
+            render.render_meme(text, background, width, height, scale, seed)))
+        return Asset("render.png", data, "image/png")
+
+    return route
@@ -0,0 +1,131 @@
+"""批量出图：从 JSONL / CSV 读取文字，多进程渲染成 PNG。
+
+每行字段：text（必填）、background、seed、name。参数不对或出图失败的行跳过并报告，
+其余照常写出，有失败时退出码为 1。
+    python render_cli.py memes.jsonl -o out/ --workers 8
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import render
+from render_cache import RenderCache, cache_key
+
+
+def read_jobs(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    return [row for row in rows if isinstance(row, dict) and row.get("text")]
+
+
+def job_params(row, options):
+    """行 → render_meme 参数；参数不合法时抛 ValueError，在提交给进程池之前就报出来。"""
+    text = row["text"]
+    background = row.get("background") or options["background"]
+    if not isinstance(text, str):
+        raise ValueError("text must be a string")
+    if not isinstance(background, str):
+        raise ValueError("background must be a string")
+    # rainbow:x 这类写法在这里就解析一遍
+    render.parse_background(background)
+    seed = row.get("seed")
+    return {
+        "text": text,
+        "background": background,
+        "width": options["width"],
+        "height": options["height"],
+        "scale": options["scale"],
+        # 种子按字符串处理，和前端 ?seed= 一致
+        "seed": None if seed in (None, "") else str(seed),
+    }
+
+
+def output_path(directory, row, index):
+    # name 只取文件名部分，带目录（比如 ../x）也写不到 -o 外面
+    name = os.path.basename(str(row.get("name") or ""))
+    if name in ("", ".", ".."):
+        name = f"{index:06d}"
+    return os.path.join(directory, f"{name}.png")
+
+
+def render_job(params):
+    # 单张出错不能拖垮整批：把错误带回主进程报告
+    try:
+        return render.encode_png(render.render_meme(**params)), None
+    except Exception as err:
+        return None, f"{type(err).__name__}: {err}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help=".jsonl 或带表头的 .csv")
+    parser.add_argument("-o", "--output", default="renders")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--background", default="bliss", help="white / win98 / bliss / rainbow[:N] / 图片路径")
+    parser.add_argument("--width", type=int, default=render.DEFAULT_WIDTH)
+    parser.add_argument("--height", type=int, default=render.DEFAULT_HEIGHT)
+    parser.add_argument("--scale", type=float, default=render.DEFAULT_SCALE)
+    parser.add_argument("--no-cache", action="store_true", help="不读写渲染缓存（缓存配置见 render_cache.py）")
+    args = parser.parse_args(argv)
+
+    jobs = read_jobs(args.input)
+    os.makedirs(args.output, exist_ok=True)
+    options = {
+        "background": args.background,
+        "width": args.width, "height": args.height, "scale": args.scale,
+    }
+    cache = None if args.no_cache else RenderCache.from_env()
+
+    started = time.perf_counter()
+    outputs, pending, failed = [], [], []
+    for i, row in enumerate(jobs):
+        path = output_path(args.output, row, i)
+        try:
+            params = job_params(row, options)
+        except ValueError as err:
+            failed.append(path)
+            print(f"skipped row {i} ({path}): {err}", file=sys.stderr)
+            continue
+        key = cache_key(**params)
+        data = cache.get(key) if cache else None
+        if data is None:
+            pending.append((path, key, params))
+        else:
+            outputs.append((path, data))
+
+    # 缓存读写只在主进程里做，子进程只负责出图
+    def finished():
+        yield from outputs
+        # 每个任务只有几十毫秒，分块提交省掉大部分进程间往返
+        chunksize = max(1, len(pending) // (args.workers * 4))
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            rendered = pool.map(render_job, [params for _, _, params in pending], chunksize=chunksize)
+            for (path, key, _), (data, error) in zip(pending, rendered):
+                if error:
+                    failed.append(path)
+                    print(f"failed {path}: {error}", file=sys.stderr)
+                    continue
+                if cache:
+                    cache.put(key, data)
+                yield path, data
+
+    written = 0
+    for written, (path, data) in enumerate(finished(), 1):
+        with open(path, "wb") as f:
+            f.write(data)
+        print(f"[{written}/{len(jobs)}] {path}", file=sys.stderr)
+    elapsed = time.perf_counter() - started
+    print(f"{written} images in {elapsed:.1f}s ({written / max(elapsed, 1e-9):.1f}/s, "
+          f"{len(outputs)} from cache, {len(failed)} failed)", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
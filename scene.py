@@ -0,0 +1,124 @@
+"""场景编码：分享链接（?scene=）和 Streamlit 场景同步用的紧凑二进制格式，和 frontend/scene-format.js 对应。
+
+场景是 {"width", "height", "background", "floaters": [[text, x, y, vx, vy, style]]}，
+style 是 packStyle 的 14 个数：[type, font, size, pad_y, pad_x, c1, c2, c3, angle, scale_x, scale_y, skew, rotate, outline]。
+"""
+import base64
+import math
+import struct
+import zlib
+
+SCENE_FORMAT = 1
+COMPRESSED = 0x80
+BACKGROUNDS = ("white", "win98", "bliss", "rainbow")
+# 地址栏里放得下，几百个文字的场景也装得下
+MAX_TOKEN = 16384
+MAX_BODY = 65536
+
+# 样式里各个下标 / 档位的取值范围（含两端），和 frontend/styles.js 一致：
+# 类型 10 种；字体是 ATLAS_FONTS 下标；字号、内边距是 ATLAS_SIZES、ATLAS_PADDINGS；色相、渐变角度各 24 档
+_STYLE_RANGES = ((0, 9), (0, 8), (12, 150), (4, 25), (4, 25), (0, 23), (0, 23), (0, 23), (0, 23))
+
+_HEADER = struct.Struct("<HHH")
+_POSE = struct.Struct("<hhbb")
+_STYLE = struct.Struct("<9BBBbb")
+
+
+def _clamp(value, low, high):
+    # 和 Math.round 一样 .5 向上取整
+    return max(low, min(high, math.floor(value + 0.5)))
+
+
+def pack_scene(scene):
+    out = bytearray()
+    name, _, index = str(scene["background"]).partition(":")
+    # 上传的图分享不出去，按 bliss 记
+    out.append(BACKGROUNDS.index(name) if name in BACKGROUNDS else BACKGROUNDS.index("bliss"))
+    if name == "rainbow":
+        out.append(_clamp(int(index or 0), 0, 255))
+    floaters = scene["floaters"]
+    out += _HEADER.pack(_clamp(scene["width"], 0, 65535), _clamp(scene["height"], 0, 65535), len(floaters))
+    for text, x, y, vx, vy, style in floaters:
+        data = text.encode("utf-8")
+        n = len(data)
+        while n > 0x7F:
+            out.append((n & 0x7F) | 0x80)
+            n >>= 7
+        out.append(n)
+        out += data
+        out += _POSE.pack(_clamp(x, -32768, 32767), _clamp(y, -32768, 32767),
+                          _clamp(vx * 500, -128, 127), _clamp(vy * 500, -128, 127))
+        kind, font, size, pad_y, pad_x, c1, c2, c3, angle, scale_x, scale_y, skew, rotate, outline = style
+        out += _STYLE.pack(
+            kind | (0x80 if outline else 0),
+            *(_clamp(v, 0, 255) for v in (font, size, pad_y, pad_x, c1, c2, c3, angle)),
+            _clamp(scale_x * 50, 0, 255), _clamp(scale_y * 50, 0, 255),
+            _clamp(skew * 4, -128, 127), _clamp(rotate * 4, -128, 127),
+        )
+    return bytes(out)
+
+
+def unpack_scene(body):
+    try:
+        offset = 0
+        name = BACKGROUNDS[body[offset]]
+        offset += 1
+        if name == "rainbow":
+            name = f"rainbow:{body[offset]}"
+            offset += 1
+        width, height, count = _HEADER.unpack_from(body, offset)
+        offset += _HEADER.size
+        floaters = []
+        for _ in range(count):
+            n = shift = 0
+            while True:
+                b = body[offset]
+                offset += 1
+                n |= (b & 0x7F) << shift
+                shift += 7
+                if not b & 0x80:
+                    break
+                if shift >= 28:
+                    raise ValueError("bad varint")
+            if offset + n > len(body):
+                raise ValueError("truncated scene")
+            text = body[offset:offset + n].decode("utf-8")
+            offset += n
+            x, y, vx, vy = _POSE.unpack_from(body, offset)
+            offset += _POSE.size
+            kind, *fields, scale_x, scale_y, skew, rotate = _STYLE.unpack_from(body, offset)
+            offset += _STYLE.size
+            for value, (low, high) in zip((kind & 0x7F, *fields), _STYLE_RANGES):
+                if not low <= value <= high:
+                    raise ValueError("bad scene style")
+            floaters.append([text, x, y, vx / 500, vy / 500,
+                             [kind & 0x7F, *fields, scale_x / 50, scale_y / 50, skew / 4, rotate / 4, kind >> 7]])
+    except (IndexError, struct.error) as e:
+        raise ValueError("truncated scene") from e
+    return {"width": width, "height": height, "background": name, "floaters": floaters}
+
+
+def encode_scene(scene):
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+    body = compressor.compress(pack_scene(scene)) + compressor.flush()
+    return base64.urlsafe_b64encode(bytes([SCENE_FORMAT | COMPRESSED]) + body).rstrip(b"=").decode("ascii")
+
+
+def decode_scene(token):
+    """格式不对时抛 ValueError。"""
+    if not token or len(token) > MAX_TOKEN:
+        raise ValueError("bad scene token")
+    data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    if not data or data[0] & ~COMPRESSED != SCENE_FORMAT:
+        raise ValueError(f"unknown scene format {data[:1].hex()}")
+    body = data[1:]
+    if data[0] & COMPRESSED:
+        # 限制解压后的大小，防止压缩炸弹
+        decompressor = zlib.decompressobj(-15)
+        try:
+            body = decompressor.decompress(body, MAX_BODY)
+        except zlib.error as e:
+            raise ValueError("bad scene data") from e
+        if decompressor.unconsumed_tail:
+            raise ValueError("scene too large")
+    return unpack_scene(body)
@@ -0,0 +1,61 @@
+"""分词服务：规则和前端 segmentText 一致（有空格按空白切，否则按词典分词），结果按文字 LRU 缓存。"""
+import functools
+import json
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+MAX_TEXT = 2000
+# 只能逐字切时一次生成的字数上限，前端 MAX_FALLBACK_CHARS 和这里保持一致
+MAX_FALLBACK_CHARS = 150
+# 没有词典分词器时：连续的字母数字算一个词，其余逐字
+_WORD = re.compile(r"[A-Za-z0-9_'’-]+|\S")
+
+
+@functools.lru_cache(maxsize=1)
+def _jieba():
+    try:
+        import jieba
+    except ImportError:
+        return None
+    jieba.setLogLevel(logging.WARNING)
+    # 词典加载要一秒左右，只做一次
+    jieba.initialize()
+    return jieba
+
+
+def has_dictionary():
+    return _jieba() is not None
+
+
+def warm_up():
+    threading.Thread(target=_jieba, name="segmentation-warm-up", daemon=True).start()
+
+
+@functools.lru_cache(maxsize=4096)
+def segment(text):
+    text = text.strip()
+    if not text:
+        return ()
+    if " " in text:
+        return tuple(text.split())
+    jieba = _jieba()
+    if jieba is None:
+        return tuple(_WORD.findall(text))
+    return tuple(w for w in jieba.lcut(text) if w.strip())
+
+
+def make_segment_route():
+    """资源服务的 /segment.json?text= 路由，返回词的 JSON 数组。"""
+    from assets import Asset
+
+    def route(query):
+        text = query.get("text", "")
+        if len(text) > MAX_TEXT:
+            raise ValueError("text too long")
+        words = list(segment(text))
+        return Asset("segment.json", json.dumps(words, ensure_ascii=False).encode(), "application/json")
+
+    return route
@@ -0,0 +1,100 @@
+"""页面模板：import 时构建一次（内联 + 压缩 + 预编译），之后只替换动态参数。"""
+import functools
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend")
+
+_PLACEHOLDER = re.compile(r"\{\{(\w+)\}\}")
+_LOCAL_STYLESHEET = re.compile(r'<link rel="stylesheet" href="([\w./-]+)">')
+_LOCAL_SCRIPT = re.compile(r'<script([^>]*) src="([\w./-]+)"></script>')
+
+
+# === 压缩 ===
+def minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+
+def minify_js(js):
+    # 保守压缩：只去掉整行注释、缩进和空行，保留换行以免影响自动分号插入
+    lines = []
+    for line in js.splitlines():
+        line = line.strip()
+        if line and not line.startswith("//"):
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def minify_html(html):
+    html = re.sub(r"<!--.*?-->", "", html, flags=re.S)
+    return re.sub(r">\s+<", "><", html).strip()
+
+
+# === 预编译 ===
+class CompiledTemplate:
+    def __init__(self, source):
+        parts = _PLACEHOLDER.split(source)
+        # 偶数位是静态片段，奇数位是参数名
+        self.chunks = parts[0::2]
+        self.names = parts[1::2]
+        self.digest = hashlib.sha256(source.encode()).hexdigest()[:16]
+
+    def render(self, values):
+        out = [self.chunks[0]]
+        for name, chunk in zip(self.names, self.chunks[1:]):
+            out.append(values[name])
+            out.append(chunk)
+        return "".join(out)
+
+
+def _read(name):
+    with open(os.path.join(FRONTEND_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def build_template(entry="index.html"):
+    html = minify_html(_read(entry))
+    html = _LOCAL_STYLESHEET.sub(lambda m: f"<style>{minify_css(_read(m.group(1)))}</style>", html)
+    html = _LOCAL_SCRIPT.sub(lambda m: f"<script{m.group(1)}>{minify_js(_read(m.group(2)))}</script>", html)
+    return CompiledTemplate(html)
+
+
+PAGE_TEMPLATE = build_template()
+
+
+# === 渲染 ===
+class RenderedPage:
+    __slots__ = ("html", "digest", "size", "gzip_size")
+
+    def __init__(self, html):
+        self.html = html
+        data = html.encode()
+        self.digest = hashlib.sha256(data).hexdigest()[:16]
+        self.size = len(data)
+        self.gzip_size = len(gzip.compress(data))
+
+
+@functools.lru_cache(maxsize=64)
+def _render(config_json):
+    page = RenderedPage(PAGE_TEMPLATE.render({"config": config_json}))
+    logger.info(
+        "page %s rendered: %d bytes (%d gzipped) per session payload",
+        page.digest, page.size, page.gzip_size,
+    )
+    return page
+
+
+def render_page(**config):
+    # 参数序列化后作为缓存键，参数不变就直接复用同一份 HTML
+    config_json = json.dumps(config, sort_keys=True, ensure_ascii=False).replace("</", "<\\/")
+    return _render(config_json)